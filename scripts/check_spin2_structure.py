@@ -25,12 +25,35 @@ and
 
   N_{mu nu rho sigma} = (q_mu k_nu + q_nu k_mu)(q_rho k_sigma + q_sigma k_rho).
 
+Alongside F2 the output carries the coefficients A, B, C, D of the full
+four-projector decomposition (spin2_decomposition.py).
+
+The sweep itself runs through the batched engine in spin2_engine.py; the
+per-sample functions below build the tensors explicitly and serve as the
+reference implementation it is checked against.  Output is committed
+chunk by chunk with a checkpoint, so an interrupted sweep can be continued
+with --resume (scan_checkpoint.py).
+
 This script is for internal checks; the analytic structure is documented in
 Appendix C of the paper.
 """
 
-import csv
+import argparse
+import collections
+import concurrent.futures
 import math
+import os
+
+import numpy as np
+
+import scan_checkpoint
+import spin2_background
+import spin2_decomposition
+import spin2_engine
+import spin2_grids
+import spin2_io
+import spin2_pairs
+import spin2_symmetry
 
 # Minkowski metric with signature (-,+,+,+)
 eta = [[-1.0, 0.0, 0.0, 0.0],
@@ -95,44 +118,408 @@ def contract_P2_N(P2, N):
                     val += P2[mu][nu][rho][sigma] * N[mu][nu][rho][sigma]
     return val
 
-# Choose a representative timelike q_mu and sample k_mu vectors
-q0 = 1.0
-q = [q0, 0.0, 0.0, 0.0]
-
-out_path = "data/spin2_F2_samples.csv"
-rows = []
-
-for omega in [0.5, 1.0, 1.5, 2.0]:
-    for kx in [0.5, 1.0, 1.5]:
-        for ky in [0.0]:
-            for kz in [0.0]:
-                k = [omega, kx, ky, kz]
-                k2 = minkowski_k2(k)
-                if abs(k2) < 1e-8:
-                    continue
-                try:
-                    P2 = P2_tensor(k)
-                except ValueError:
-                    continue
-                N = N_tensor(q, k)
-                F2_val = contract_P2_N(P2, N)
-                rows.append({
-                    "omega": omega,
-                    "kx": kx,
-                    "ky": ky,
-                    "kz": kz,
-                    "k2": k2,
-                    "F2": F2_val
-                })
-
-with open(out_path, "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow(["omega", "kx", "ky", "kz", "k2", "F2"])
-    for r in rows:
-        writer.writerow([r["omega"], r["kx"], r["ky"], r["kz"], r["k2"], r["F2"]])
-
-print(f"Wrote {len(rows)} spin-2 projector samples to {out_path}")
-# Quick human check
-num_pos = sum(1 for r in rows if r["F2"] > 0)
-num_neg = sum(1 for r in rows if r["F2"] < 0)
-print(f"F2>0 in {num_pos} samples, F2<0 in {num_neg} samples.")
+# Default sampler: omega in {0.5,1,1.5,2}, kx in {0.5,1,1.5}, ky = kz = 0
+DEFAULT_AXES = {
+    "cartesian": ("0.5:2.0:4", "0.5:1.5:3", "0", "0"),
+    "spherical": ("0.5:2.0:4", "0.5:1.5:3", "1.5707963267948966", "0"),
+}
+
+# Momenta with |k^2| below this count as near-null; they used to be dropped
+# and are now evaluated with the cancellation-free closed forms.
+NEAR_NULL_K2 = 1e-8
+
+def evaluate_F2(q, k, k2=None):
+    """Return F2 for an (N,4) array of k_mu through the closed-form fast path."""
+    if q[1] == q[2] == q[3] == 0.0:
+        kmag = np.sqrt(np.sum(k[:, 1:] * k[:, 1:], axis=1))
+        return spin2_engine.F2_rest_frame(q[0], k[:, 0], kmag, k2)
+    return spin2_engine.F2_closed_form(q, k, k2)
+
+def evaluate_all(q, k, background=None, k2=None):
+    """
+    Evaluate one chunk of k_mu without filtering; return (k2, F2, coeffs,
+    keep) where keep is False for exactly null momenta, at which the
+    projectors do not exist.
+    """
+    if background is None:
+        if k2 is None:
+            k2 = spin2_engine.k2_factored(k)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            F2 = evaluate_F2(q, k, k2)
+            coeffs = spin2_decomposition.spin_coefficients(q, k, None, k2)
+    else:
+        # Covariant contraction on gbar = eta + alpha q q
+        if k2 is None:
+            k2 = background.k2(k)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            proj = spin2_decomposition.spin_projections(q, k, background, k2)
+        F2 = proj["A"]
+        coeffs = spin2_decomposition.normalise(proj)
+    keep = (k2 != 0.0) & np.isfinite(F2)
+    for name in coeffs:
+        keep &= np.isfinite(coeffs[name])
+    return k2, F2, coeffs, keep
+
+def evaluate_chunk(q, k, background=None, k2=None):
+    """
+    Evaluate one chunk of k_mu; return (k, k2, F2, coeffs, counts).
+
+    Exactly null momenta are removed; counts records how many were
+    rejected and how many of the kept momenta are near-null
+    (|k^2| < NEAR_NULL_K2).
+    """
+    k2, F2, coeffs, keep = evaluate_all(q, k, background, k2)
+    counts = {"rejected": int(np.sum(~keep)),
+              "near_null": int(np.sum(keep & (np.abs(k2) < NEAR_NULL_K2)))}
+    coeffs = {name: value[keep] for name, value in coeffs.items()}
+    return k[keep], k2[keep], F2[keep], coeffs, counts
+
+def evaluate_light_cone(q, omega_values, k2_min, k2_max, per_decade):
+    """
+    Evaluate the adaptive near-null samples of spin2_grids.light_cone_samples
+    for the rest-frame background; return (k, k2, F2, coeffs, counts).
+    """
+    (omega, kmag, k2), n_imaginary = spin2_grids.light_cone_samples(
+        omega_values, k2_min, k2_max, per_decade)
+    zeros = np.zeros_like(omega)
+    k = np.column_stack([omega, kmag, zeros, zeros])
+    k, k2, F2, coeffs, counts = evaluate_chunk(q, k, None, k2)
+    counts["rejected"] += n_imaginary
+    return k, k2, F2, coeffs, counts
+
+def verify_F2(q, k, F2, fraction, rng):
+    """
+    Recompute a random fraction of the samples with P2_tensor, N_tensor and
+    contract_P2_N; return (number checked, max relative deviation).
+    """
+    # theta_tensor is undefined below K2_MIN, so those cannot be checked
+    eligible = np.flatnonzero(np.abs(spin2_engine.minkowski_k2(k)) >= spin2_engine.K2_MIN)
+    n_check = min(len(eligible), int(math.ceil(fraction * len(k))))
+    idx = np.sort(rng.choice(eligible, size=n_check, replace=False))
+    max_dev = 0.0
+    for i in idx:
+        k_i = k[i].tolist()
+        ref = contract_P2_N(P2_tensor(k_i), N_tensor(list(q), k_i))
+        # Where F2 vanishes the reference is pure rounding noise, so
+        # deviations are measured against at least |q|^2 |k|^2.
+        scale = max(abs(ref), float(np.dot(q, q) * np.dot(k[i], k[i])), 1e-300)
+        dev = abs(F2[i] - ref) / scale
+        max_dev = max(max_dev, dev)
+    return n_check, max_dev
+
+def parse_axis(text):
+    """argparse type for an axis spec (see spin2_grids.Axis.parse)."""
+    try:
+        return spin2_grids.Axis.parse(text)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Probe the spin-2 projector contraction F2(q,k).",
+        epilog="Axes are 'start:stop:num' (num points, endpoints included) or a "
+               "single value.  Attach specs that start with a minus sign with "
+               "'=', e.g. --kx=-2:2:5; argparse reads '--kx -2:2:5' as an option.")
+    parser.add_argument("--out", default="data/spin2_F2_samples.csv",
+                        help="output CSV path")
+    parser.add_argument("--spherical", action="store_true",
+                        help="grid in (omega, |k|, theta, phi) instead of "
+                             "(omega, kx, ky, kz)")
+    for name, text in (("omega", "omega axis"),
+                       ("kx", "kx axis (cartesian)"),
+                       ("ky", "ky axis (cartesian)"),
+                       ("kz", "kz axis (cartesian)"),
+                       ("kmag", "|k| axis (spherical)"),
+                       ("theta", "polar angle axis (spherical)"),
+                       ("phi", "azimuth axis (spherical)")):
+        parser.add_argument("--" + name, type=parse_axis, default=None,
+                            metavar="START:STOP:NUM",
+                            help=text + f"; use --{name}=-1:1:3 for a negative start")
+    parser.add_argument("--chunk-size", type=int,
+                        default=spin2_grids.DEFAULT_CHUNK_SIZE,
+                        help="grid points evaluated per chunk (one shard)")
+    parser.add_argument("--light-cone", action="store_true",
+                        help="add samples densified log-uniformly in |k^2| "
+                             "toward the light cone for every omega")
+    parser.add_argument("--lc-out", default="data/spin2_F2_light_cone.csv",
+                        help="output CSV for the light-cone samples")
+    parser.add_argument("--lc-k2-min", type=float, default=1e-14,
+                        help="smallest |k^2| of the light-cone samples")
+    parser.add_argument("--lc-k2-max", type=float, default=NEAR_NULL_K2,
+                        help="largest |k^2| of the light-cone samples")
+    parser.add_argument("--lc-per-decade", type=int, default=4,
+                        help="light-cone samples per decade of |k^2|")
+    parser.add_argument("--reduce", action="store_true",
+                        help="for a purely timelike q, evaluate only the "
+                             "(omega, |k|) plane and write a reduced table")
+    parser.add_argument("--reduced-out", default="data/spin2_F2_reduced.csv",
+                        help="reduced table path (metadata goes to PATH.json)")
+    parser.add_argument("--expand-from", default=None, metavar="META",
+                        help="expand a reduced table (given its .json sidecar) "
+                             "to full rows in --out, without re-evaluating")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes evaluating shards (0: one per core)")
+    parser.add_argument("--alpha", type=float, default=None,
+                        help="contract covariantly on gbar = eta + alpha q q "
+                             "instead of summing lowered indices")
+    parser.add_argument("--projectors-out", default=None,
+                        help="also save the four spin projectors per sample in "
+                             "packed symmetric-pair form (.npy, shape (N,4,55))")
+    parser.add_argument("--verify", action="store_true",
+                        help="cross-check samples against the tensor path")
+    parser.add_argument("--verify-fraction", type=float, default=0.1,
+                        help="fraction of samples sent through the tensor path")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for choosing the verified samples")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted scan from its checkpoint "
+                             "(OUT.ckpt, written after every chunk)")
+    args = parser.parse_args(argv)
+    if args.light_cone and args.alpha is not None:
+        parser.error("--light-cone uses the rest-frame flat contraction; drop --alpha")
+    if args.reduce:
+        # The reduced table is written in one pass by scan_reduced, which
+        # has none of the full scan's extra outputs, checks or shards
+        unsupported = [flag for flag, used in (("--verify", args.verify),
+                                               ("--projectors-out", args.projectors_out),
+                                               ("--resume", args.resume),
+                                               ("--workers", args.workers != 1),
+                                               ("--light-cone", args.light_cone))
+                       if used]
+        if unsupported:
+            parser.error("--reduce does not support " + ", ".join(unsupported))
+
+    names = ("kmag", "theta", "phi") if args.spherical else ("kx", "ky", "kz")
+    unused = ("kx", "ky", "kz") if args.spherical else ("kmag", "theta", "phi")
+    for name in unused:
+        if getattr(args, name) is not None:
+            parser.error(f"--{name} does not apply to this parametrisation")
+    parametrisation = "spherical" if args.spherical else "cartesian"
+    defaults = DEFAULT_AXES[parametrisation]
+    specs = [getattr(args, name) for name in ("omega",) + names]
+    args.parametrisation = parametrisation
+    args.axes = [spec if spec is not None else spin2_grids.Axis.parse(default)
+                 for spec, default in zip(specs, defaults)]
+    return args
+
+CSV_HEADER = "omega,kx,ky,kz,k2,F2,A,B,C,D\r\n"
+
+def format_samples(k, k2, F2, coeffs):
+    """Return CSV text for one chunk of evaluated samples."""
+    return spin2_io.format_rows(np.column_stack(
+        [k, k2, F2, coeffs["A"], coeffs["B"], coeffs["C"], coeffs["D"]]))
+
+def scan_shard(task):
+    """
+    Evaluate the grid points with flat indices [lo, hi) of one shard.
+
+    Returns a dict with the end index hi, the CSV text, RunningStats,
+    packed projectors (or None), near-null/rejected counts and (number
+    verified, max relative deviation).  Everything a shard
+    produces depends only on the task, so shards can run in any process
+    and still merge into the same bytes.
+    """
+    q = task["q"]
+    background = None
+    if task["alpha"] is not None:
+        background = spin2_background.get_background(q, task["alpha"])
+    (k,) = spin2_grids.momentum_chunks(task["axes"], task["parametrisation"],
+                                       task["hi"] - task["lo"],
+                                       task["lo"], task["hi"])
+    k, k2, F2, coeffs, counts = evaluate_chunk(q, k, background)
+    text = format_samples(k, k2, F2, coeffs)
+    stats = spin2_io.RunningStats()
+    stats.update(F2)
+    packed = None
+    if task["projectors"]:
+        # Per-sample projectors in 55-entry symmetric-pair form
+        projectors = spin2_pairs.projector_pairs(k, background)
+        packed = np.stack([spin2_pairs.pack_triu(projectors[name])
+                           for name in ("A", "B", "C", "D")], axis=1)
+    verified = (0, 0.0)
+    if task["verify_fraction"] and background is None:
+        rng = np.random.default_rng([task["seed"], task["lo"]])
+        verified = verify_F2(q, k, F2, task["verify_fraction"], rng)
+    return {"hi": task["hi"], "text": text, "stats": stats, "packed": packed,
+            "counts": counts, "verified": verified}
+
+def iter_shards(tasks, workers=1):
+    """
+    Yield scan_shard results in task order.  With several workers the
+    shards run in a process pool, with at most 2 * workers in flight so
+    memory stays bounded by a few chunks.
+    """
+    if workers == 1:
+        for task in tasks:
+            yield scan_shard(task)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.submit(scan_shard, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def scan_reduced(q, args):
+    """
+    Evaluate only the (omega, |k|) plane of the grid and write the reduced
+    table plus its symmetry metadata sidecar.
+    """
+    background = None
+    if args.alpha is not None:
+        background = spin2_background.get_background(q, args.alpha)
+    omega_axis = args.axes[0]
+    omega_values = omega_axis.values(np.arange(omega_axis.num))
+    kmag2 = spin2_symmetry.distinct_kmag2(args.axes, args.parametrisation,
+                                          args.chunk_size)
+    k, k2 = spin2_symmetry.reduced_momenta(omega_values, kmag2)
+    if background is not None:
+        k2 = None
+    k2, F2, coeffs, keep = evaluate_all(q, k, background, k2)
+    # Look-ups on expansion need |k|^2 exactly as the full grid sums it
+    kmag2 = np.tile(kmag2, len(omega_values))
+    rows = np.column_stack([k[:, 0], k[:, 1], kmag2, k2, F2, coeffs["A"],
+                            coeffs["B"], coeffs["C"], coeffs["D"]])[keep]
+    rejected = int(np.sum(~keep))
+    with open(args.reduced_out, "w", newline="") as f:
+        f.write(",".join(spin2_symmetry.REDUCED_COLUMNS) + "\r\n")
+        f.write(spin2_io.format_rows(rows))
+    n_full = spin2_grids.grid_size(args.axes)
+    spin2_symmetry.write_metadata(args.reduced_out + ".json", q, args.alpha,
+                                  args.axes, args.parametrisation, n_full,
+                                  len(rows), args.reduced_out)
+    print(f"Rotational symmetry: evaluated {len(keep)} (omega, |k|) points "
+          f"instead of {n_full} grid points, kept {len(rows)} and rejected "
+          f"{rejected}; wrote {args.reduced_out} and {args.reduced_out}.json.")
+
+def expand_reduced(meta_path, out_path, chunk_size):
+    """Expand a reduced table back to full 3-momentum rows in grid order."""
+    meta = spin2_symmetry.read_metadata(meta_path)
+    table = spin2_symmetry.load_reduced_table(meta["table"])
+    n_rows = 0
+    with open(out_path, "w", newline="") as f:
+        f.write(CSV_HEADER)
+        for rows in spin2_symmetry.expand_chunks(meta, table, chunk_size):
+            f.write(spin2_io.format_rows(rows))
+            n_rows += len(rows)
+    print(f"Expanded {meta['table']} to {n_rows} spin-2 samples in {out_path}")
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Choose a representative timelike q_mu and sample k_mu vectors
+    q0 = 1.0
+    q = [q0, 0.0, 0.0, 0.0]
+
+    if args.expand_from:
+        expand_reduced(args.expand_from, args.out, args.chunk_size)
+        return
+    if args.reduce:
+        if spin2_symmetry.has_rotational_symmetry(q):
+            scan_reduced(q, args)
+            return
+        print("q_mu has spatial components; no rotational symmetry, running the full scan.")
+
+    out_path = args.out
+    workers = args.workers or os.cpu_count()
+
+    # The grid is split into shards of --chunk-size points, evaluated with
+    # the closed form (in a process pool when --workers > 1), and written
+    # and summarised in grid order; the nested-list functions above are
+    # the reference implementation.
+    n_points = spin2_grids.grid_size(args.axes)
+    # Everything that changes the rows or their order belongs to the
+    # checkpoint configuration; --workers does not.
+    config = {"q": q, "alpha": args.alpha, "parametrisation": args.parametrisation,
+              "axes": [[a.start, a.stop, a.num] for a in args.axes],
+              "chunk_size": args.chunk_size, "projectors": args.projectors_out,
+              "verify": args.verify, "verify_fraction": args.verify_fraction,
+              "seed": args.seed}
+    checkpoint = scan_checkpoint.Checkpoint(out_path, config)
+    state = None
+    if args.resume:
+        try:
+            state = checkpoint.load()
+        except ValueError as exc:
+            # A checkpoint of a different configuration: a usage error
+            raise SystemExit("error: %s" % exc)
+    if args.resume and state is None:
+        print(f"No checkpoint for {out_path}; starting from the beginning.")
+    start = state["next"] if state else 0
+    tasks = ({"q": q, "alpha": args.alpha, "axes": args.axes,
+              "parametrisation": args.parametrisation,
+              "lo": lo, "hi": min(lo + args.chunk_size, n_points),
+              "projectors": bool(args.projectors_out),
+              "verify_fraction": args.verify_fraction if args.verify else 0.0,
+              "seed": args.seed}
+             for lo in range(start, n_points, args.chunk_size))
+    if state:
+        stats = spin2_io.RunningStats.from_state(state["stats"])
+        n_check, max_dev = state["n_check"], state["max_dev"]
+        near_null, rejected = state["near_null"], state["rejected"]
+    else:
+        stats = spin2_io.RunningStats()
+        n_check, max_dev = 0, 0.0
+        near_null, rejected = 0, 0
+    projectors_out = None
+    if args.projectors_out:
+        projectors_out = spin2_io.NpyAppender(args.projectors_out, (4, 55),
+                                              rows=state["packed_rows"] if state else 0)
+    with scan_checkpoint.open_output(out_path, state) as f:
+        if state is None:
+            f.write(CSV_HEADER.encode("ascii"))
+        for result in iter_shards(tasks, workers):
+            f.write(result["text"].encode("ascii"))
+            stats.merge(result["stats"])
+            if projectors_out is not None:
+                projectors_out.append(result["packed"])
+                projectors_out.flush()
+            near_null += result["counts"]["near_null"]
+            rejected += result["counts"]["rejected"]
+            n_check += result["verified"][0]
+            max_dev = max(max_dev, result["verified"][1])
+            # Commit the shard: output on disk first, then the checkpoint
+            scan_checkpoint.sync(f)
+            checkpoint.save(next=result["hi"], bytes=f.tell(),
+                            stats=stats.state(), n_check=n_check, max_dev=max_dev,
+                            near_null=near_null, rejected=rejected,
+                            packed_rows=projectors_out.rows if projectors_out else 0)
+    # Finalise the .npy header before dropping the checkpoint that could
+    # otherwise recover it
+    if projectors_out is not None:
+        projectors_out.close()
+    checkpoint.remove()
+
+    print(f"Wrote {stats.count} spin-2 projector samples to {out_path}")
+    # Quick human check
+    print(f"F2>0 in {stats.n_pos} samples, F2<0 in {stats.n_neg} samples.")
+    if stats.count:
+        print(f"F2 range: [{stats.min:.6g}, {stats.max:.6g}]")
+    print(f"Near light cone: {near_null} grid points with |k^2| < {NEAR_NULL_K2:g} "
+          f"evaluated, {rejected} exactly null points rejected.")
+
+    if args.light_cone:
+        omega_axis = args.axes[0]
+        k, k2, F2, coeffs, counts = evaluate_light_cone(
+            q, omega_axis.values(np.arange(omega_axis.num)),
+            args.lc_k2_min, args.lc_k2_max, args.lc_per_decade)
+        with open(args.lc_out, "w", newline="") as f:
+            f.write(CSV_HEADER)
+            f.write(format_samples(k, k2, F2, coeffs))
+        print(f"Light-cone refinement: {len(F2)} samples with "
+              f"{args.lc_k2_min:g} <= |k^2| <= {args.lc_k2_max:g} written to "
+              f"{args.lc_out}, {counts['rejected']} rejected.")
+
+    if projectors_out is not None:
+        print(f"Wrote {projectors_out.rows} packed spin projectors to {args.projectors_out}")
+
+    if args.verify and args.alpha is not None:
+        print("--verify checks the flat contraction only; skipped with --alpha.")
+    elif args.verify:
+        print(f"Verified {n_check} samples against the tensor path: "
+              f"max relative deviation {max_dev:.3e}")
+
+if __name__ == "__main__":
+    main()
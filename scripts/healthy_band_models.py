@@ -0,0 +1,162 @@
+"""
+Concrete P(X) families for model-driven healthy-band scans.
+
+Each model maps a batch of parameter vectors theta (an (N, p) array, one
+column per parameter) to P'(X0) and P''(X0) through closed-form derivatives
+evaluated as array operations, so a batch of 10^6 or more parameter points
+costs a handful of vector operations.  The families are
+
+  polynomial   P(X) = c1 X + c2 X^2 + c3 X^3,
+  dbi          P(X) = A T (1 - sqrt(1 - 2 X / T)),
+  exponential  P(X) = A M (exp(X / M) - 1).
+
+The DBI square root is real only for 2 X0 < T; outside that domain both
+derivatives are NaN, and NaN points fail the ghost and gradient tests.
+check_derivatives compares the closed forms with central differences of
+P(X), and model scans run it before sampling.
+"""
+
+import abc
+
+import numpy as np
+
+# Step (relative to max(|X|, 1)) and tolerance of the finite-difference check
+DERIV_CHECK_STEP = 1e-4
+DERIV_CHECK_RTOL = 1e-4
+
+
+class PXModel(abc.ABC):
+    """
+    A P(X) family: params lists the parameter names (the columns of theta)
+    and default_ranges a uniform sampling box for each.  Subclasses must
+    implement P and derivatives.
+    """
+
+    name = None
+    params = ()
+    default_ranges = {}
+
+    @abc.abstractmethod
+    def P(self, X, theta):
+        """Return P(X) for an (N, p) array of parameter vectors."""
+
+    @abc.abstractmethod
+    def derivatives(self, X, theta):
+        """Return (P'(X), P''(X)) for an (N, p) array of parameter vectors."""
+
+    def central_differences(self, X, theta, h):
+        """Return central-difference estimates of (P'(X), P''(X)) with step h."""
+        P_plus, P_mid, P_minus = (self.P(x, theta) for x in (X + h, X, X - h))
+        return ((P_plus - P_minus) / (2.0 * h),
+                (P_plus - 2.0 * P_mid + P_minus) / (h * h))
+
+    def check_derivatives(self, X, theta, step=DERIV_CHECK_STEP):
+        """
+        Compare derivatives() with central differences of P at X.  Returns
+        the largest deviation of P' or P'', relative to max(|exact|, 1),
+        beyond the truncation error of the stencil (estimated from the
+        change between steps h and 2h, large only next to a singularity
+        such as the DBI edge 2 X = T), over the points where all values
+        are finite.
+        """
+        h = step * max(abs(X), 1.0)
+        fine = self.central_differences(X, theta, h)
+        coarse = self.central_differences(X, theta, 2.0 * h)
+        worst = 0.0
+        for fd, fd2, exact in zip(fine, coarse, self.derivatives(X, theta)):
+            ok = np.isfinite(fd) & np.isfinite(fd2) & np.isfinite(exact)
+            excess = np.abs(fd[ok] - exact[ok]) - np.abs(fd2[ok] - fd[ok])
+            dev = excess / np.maximum(np.abs(exact[ok]), 1.0)
+            worst = max(worst, float(dev.max(initial=0.0)))
+        return worst
+
+    def sample(self, rng, n, ranges=None):
+        """Draw n parameter vectors uniformly from the sampling box."""
+        box = dict(self.default_ranges)
+        box.update(ranges or {})
+        lo = np.array([box[p][0] for p in self.params])
+        hi = np.array([box[p][1] for p in self.params])
+        return lo + (hi - lo) * rng.random((n, len(self.params)))
+
+
+class PolynomialModel(PXModel):
+    name = "polynomial"
+    params = ("c1", "c2", "c3")
+    default_ranges = {"c1": (-1.0, 1.0), "c2": (-1.0, 1.0), "c3": (-1.0, 1.0)}
+
+    def P(self, X, theta):
+        c1, c2, c3 = theta.T
+        return X * (c1 + X * (c2 + X * c3))
+
+    def derivatives(self, X, theta):
+        c1, c2, c3 = theta.T
+        return c1 + X * (2.0 * c2 + 3.0 * X * c3), 2.0 * c2 + 6.0 * X * c3
+
+
+class DBIModel(PXModel):
+    name = "dbi"
+    params = ("A", "T")
+    default_ranges = {"A": (-1.0, 1.0), "T": (0.1, 10.0)}
+
+    def P(self, X, theta):
+        A, T = theta.T
+        with np.errstate(invalid="ignore"):
+            return A * T * (1.0 - np.sqrt(1.0 - 2.0 * X / T))
+
+    def derivatives(self, X, theta):
+        A, T = theta.T
+        u = 1.0 - 2.0 * X / T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            inv_root = np.where(u > 0.0, 1.0 / np.sqrt(u), np.nan)
+        return A * inv_root, A * inv_root ** 3 / T
+
+
+class ExponentialModel(PXModel):
+    name = "exponential"
+    params = ("A", "M")
+    default_ranges = {"A": (-1.0, 1.0), "M": (0.2, 5.0)}
+
+    def P(self, X, theta):
+        A, M = theta.T
+        return A * M * np.expm1(X / M)
+
+    def derivatives(self, X, theta):
+        A, M = theta.T
+        P1 = A * np.exp(X / M)
+        return P1, P1 / M
+
+
+MODELS = {model.name: model for model in (PolynomialModel(), DBIModel(), ExponentialModel())}
+
+
+def parse_param_range(text):
+    """Parse 'NAME=MIN:MAX' or 'MODEL.NAME=MIN:MAX' into (name, (min, max))."""
+    name, _, bounds = text.partition("=")
+    lo, hi = (float(x) for x in bounds.split(":"))
+    return name, (lo, hi)
+
+
+def resolve_param_ranges(model_names, overrides):
+    """
+    Return {model: {param: (min, max)}} for the named models, with the
+    (name, range) overrides from parse_param_range applied.  A name
+    qualified as MODEL.NAME applies to that model only; a bare name must
+    belong to exactly one of the models.  Anything else is a ValueError.
+    """
+    ranges = {name: dict(MODELS[name].default_ranges) for name in model_names}
+    for name, bounds in overrides:
+        model, _, param = name.rpartition(".")
+        if model:
+            if model not in ranges or param not in ranges[model]:
+                raise ValueError("no parameter %r in the selected models" % name)
+            owners = [model]
+        else:
+            owners = [m for m in model_names if param in ranges[m]]
+            if not owners:
+                raise ValueError("no parameter %r in the selected models (%s)"
+                                 % (param, ", ".join(model_names)))
+            if len(owners) > 1:
+                raise ValueError("parameter %r is ambiguous; qualify it as one of %s"
+                                 % (param, ", ".join(m + "." + param for m in owners)))
+        ranges[owners[0]][param] = bounds
+    return ranges
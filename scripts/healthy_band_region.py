@@ -0,0 +1,82 @@
+"""
+Exact stable region of the healthy-band scan.
+
+Both conditions are linear in (P', P''):
+
+  Z_s = P'               > 0,
+  Z_t = P' + 2 X0 P''    > 0,
+
+so inside the rectangular scan window the healthy set is the convex
+polygon obtained by clipping the rectangle against the two half-planes.
+Its vertices and area follow in O(1) from Sutherland-Hodgman clipping and
+the shoelace formula, without sampling any grid points.  The strict
+inequalities only remove boundary lines of zero area, so the closed
+polygon is returned.
+
+The area fraction is the limit of the grid-counted stable fraction as the
+step goes to zero, and is the reference for grid-convergence checks.
+"""
+
+
+def healthy_half_planes(X0):
+    """Return the healthy-band half-planes a * P' + b * P'' > 0 as (a, b)."""
+    return [(1.0, 0.0),        # Z_s > 0
+            (1.0, 2.0 * X0)]   # Z_t > 0
+
+
+def window_polygon(pmin, pmax, p2min, p2max):
+    """Counter-clockwise vertices of the scan window."""
+    return [(pmin, p2min), (pmax, p2min), (pmax, p2max), (pmin, p2max)]
+
+
+def clip_half_plane(polygon, a, b, c=0.0):
+    """
+    Clip a convex polygon (list of (x, y) vertices) to a * x + b * y + c >= 0.
+    Vertices keep their orientation; an empty list means nothing survives.
+    """
+    out = []
+    n = len(polygon)
+    for i in range(n):
+        x0, y0 = polygon[i]
+        x1, y1 = polygon[(i + 1) % n]
+        d0 = a * x0 + b * y0 + c
+        d1 = a * x1 + b * y1 + c
+        if d0 >= 0.0:
+            out.append((x0, y0))
+        if (d0 > 0.0 and d1 < 0.0) or (d0 < 0.0 and d1 > 0.0):
+            t = d0 / (d0 - d1)
+            out.append((x0 + t * (x1 - x0), y0 + t * (y1 - y0)))
+    return out
+
+
+def polygon_area(polygon):
+    """Shoelace area of a simple polygon (positive for either orientation)."""
+    n = len(polygon)
+    twice = 0.0
+    for i in range(n):
+        x0, y0 = polygon[i]
+        x1, y1 = polygon[(i + 1) % n]
+        twice += x0 * y1 - x1 * y0
+    return abs(twice) / 2.0
+
+
+def stable_region(X0, pmin, pmax, p2min, p2max):
+    """
+    Return (vertices, area, fraction) of the healthy set inside the window
+    [pmin, pmax] x [p2min, p2max] of the (P'(X0), P''(X0)) plane.
+    """
+    polygon = window_polygon(pmin, pmax, p2min, p2max)
+    for a, b in healthy_half_planes(X0):
+        polygon = clip_half_plane(polygon, a, b)
+    area = polygon_area(polygon)
+    window_area = (pmax - pmin) * (p2max - p2min)
+    return polygon, area, area / window_area
+
+
+if __name__ == "__main__":
+    import scan_healthy_band as scan
+
+    vertices, area, fraction = stable_region(
+        scan.X0, scan.PPRIME_MIN, scan.PPRIME_MAX, scan.P2PRIME_MIN, scan.P2PRIME_MAX)
+    print("Vertices:", ", ".join("(%.6g, %.6g)" % v for v in vertices))
+    print(f"Area = {area:.6g}, fraction = {fraction:.6g}")
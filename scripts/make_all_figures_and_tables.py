@@ -2,26 +2,75 @@
 """
 Generate data-driven figures and LaTeX tables from the CSV files in data/:
 
-  - data/healthy_band_scan.csv
+  - data/healthy_band_scan.csv       (or data/healthy_band_scan.hbs, which
+                                      is memory-mapped and used if present)
+  - data/healthy_band_cells.csv      (optional, from scan_healthy_band.py --adaptive)
+  - data/healthy_band_X0_sweep.csv   (optional, from scan_healthy_band.py --sweep-X0)
+  - data/healthy_band_qmc.json       (optional, from scan_healthy_band.py --qmc)
+  - data/healthy_band_scan.csv.cs2.json (optional, counts and c_s^2 histogram
+                                      of the grid scan; .hbs.cs2.json for a
+                                      binary scan)
   - data/spin2_F2_samples.csv
 
 Outputs:
 
   Figures:
     figures/fig_healthy_band_scan.png   (stable vs unstable points)
+    figures/fig_healthy_band_cells.png  (adaptive quadtree cells, if present)
+    figures/fig_healthy_band_X0_sweep.png (stable fraction and slope vs X0, if present)
+    figures/fig_healthy_band_cs2.png    (c_s^2 distribution of stable points, if present)
     figures/fig_spin2_F2_vs_k2.png      (F2 vs k^2)
 
   Tables (LaTeX):
     results/table_healthy_band_stats.tex
     results/table_spin2_F2_stats.tex
 
-This version uses only the Python standard library + matplotlib (no pandas).
+X0 and the scan window are read from the JSON sidecars the scanner writes
+next to each CSV (see scan_healthy_band.read_sidecar), or from the header
+of the binary scan.  The QMC estimate and the c_s^2 summary enter the
+stats table only if they were computed for the same X0 and (P', P'')
+window as the scan.  Flags of a binary scan are counted from the packed
+bits without unpacking, and only a strided subgrid of at most
+MAX_SCATTER_POINTS points is read for the scatter plot.
+
+CSV files are parsed once into typed numpy arrays (read_columns), reading
+only the columns a figure or table needs; CSVs larger than MMAP_THRESHOLD
+are converted block by block into memory-mapped column files.  Parsed
+columns are cached in .cache/columns/, keyed by a hash of the CSV
+contents, so unchanged CSVs are not parsed again.
+
+Each artifact is rebuilt only when its build record -- the hash of this
+script, the hashes of its input files and its parameters, kept in
+.cache/build_manifest.json -- has changed or an output is missing;
+--force rebuilds everything.  Skipped artifacts are listed at the end.
+Stale artifacts are independent of each other and are rendered in
+parallel by --jobs worker processes, each timed separately.
+
+matplotlib is imported only when a figure is drawn, with the Agg backend;
+--tables-only builds just the tables without importing it, and
+--figures-only just the figures.
+
+This version uses numpy + matplotlib (no pandas).
 """
 
+import argparse
+import atexit
+import functools
+import hashlib
+import itertools
+import json
 import os
-import csv
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import matplotlib.pyplot as plt
+import numpy as np
+
+import healthy_band_io
+import healthy_band_region
+import scan_healthy_band
+import spin2_io
 
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -33,63 +82,314 @@ RES_DIR = os.path.join(PROJECT_ROOT, "results")
 os.makedirs(FIG_DIR, exist_ok=True)
 os.makedirs(RES_DIR, exist_ok=True)
 
+# Points drawn in the healthy-band scatter plot of a binary scan
+MAX_SCATTER_POINTS = 200_000
+
+FIG_DPI = 200
+
+# Input hashes, script version and parameters each artifact was last built from
+MANIFEST_PATH = os.path.join(PROJECT_ROOT, ".cache", "build_manifest.json")
+
 
 # ---------- Loaders ----------
 
-def load_healthy_band():
+# Column types of the data CSVs; columns not listed are float64
+COLUMN_DTYPES = {"ghost_ok": np.int8, "grad_ok": np.int8, "level": np.int8,
+                 "n_points": np.int64, "n_stable": np.int64}
+
+# Columns whose empty fields (cs2 of points with Zt = 0) are read as NaN
+NAN_IF_EMPTY = ("cs2",)
+
+# CSVs larger than this are parsed MMAP_BLOCK_ROWS rows at a time into
+# memory-mapped column files instead of into memory
+MMAP_THRESHOLD = 1 << 30
+MMAP_BLOCK_ROWS = 1 << 20
+
+
+# Parsed columns are cached as .npy files in CACHE_DIR/<key>/, where the
+# key hashes LOADER_VERSION and the CSV contents; least recently used
+# entries are evicted beyond CACHE_MAX_BYTES.  Entries used or written
+# within CACHE_GRACE seconds are never evicted, since another process may
+# still be parsing into them.  Bump LOADER_VERSION whenever the parsing
+# or COLUMN_DTYPES change.
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "columns")
+CACHE_MAX_BYTES = 256 << 20
+CACHE_GRACE = 600
+LOADER_VERSION = 1
+
+
+def _float_or_nan(text):
+    return float(text) if text else float("nan")
+
+
+def _read_header(path):
+    with open(path, encoding="utf-8") as f:
+        return f.readline().strip().split(",")
+
+
+def content_key(path):
+    """Cache key of a CSV: SHA-256 of the loader version and the file contents."""
+    digest = hashlib.sha256(b"loader %d\n" % LOADER_VERSION)
+    return _digest_file(digest, path).hexdigest()
+
+
+def _digest_file(digest, path):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest
+
+
+def _entry_stat(path):
+    """
+    Return (last use, last change, size) of a cache entry, or None if it
+    has just been removed.  A parse in progress keeps changing the files
+    it writes, so an entry changed recently may still be filling.
+    """
+    try:
+        used = os.stat(path).st_mtime
+        files = [f.stat() for f in os.scandir(path)]
+    except FileNotFoundError:
+        return None
+    changed = max([used] + [f.st_mtime for f in files])
+    return used, changed, sum(f.st_size for f in files)
+
+
+def evict_cache(keep=None, max_bytes=CACHE_MAX_BYTES, grace=CACHE_GRACE):
+    """
+    Remove the least recently used cache entries until the rest fit in
+    max_bytes.  The entry keep (a directory path) and entries changed
+    within grace seconds are never removed; stale entries holding nothing
+    (left behind by failed parses) always are.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        stat = _entry_stat(entry.path)
+        if stat is not None:
+            entries.append((stat, entry.path))
+    cutoff = time.time() - grace
+    total = 0
+    for (_, changed, size), path in sorted(entries, reverse=True):
+        if (path != keep and changed < cutoff
+                and (size == 0 or total + size > max_bytes)):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            total += size
+
+
+def _temp_path(out_dir, name):
+    """
+    A fresh temporary file for column name in out_dir, unique so that
+    processes parsing the same CSV into one cache entry never share it.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=name + ".", suffix=".npy.tmp", dir=out_dir)
+    os.close(fd)
+    return tmp
+
+
+def _parse_csv(path, names, mmap, out_dir):
+    """
+    Parse the columns names of a CSV in a single pass.  The arrays are
+    saved as out_dir/NAME.npy if out_dir is given; in mmap mode the file
+    is parsed block by block into those files (in a temporary directory
+    if out_dir is None) and memory maps of them are returned.
+    """
+    header = _read_header(path)
+    missing = [name for name in names if name not in header]
+    if missing:
+        raise KeyError("%s has no column(s) %s" % (path, ", ".join(missing)))
+    usecols = [header.index(name) for name in names]
+    dtype = [(name, COLUMN_DTYPES.get(name, np.float64)) for name in names]
+    converters = {header.index(name): _float_or_nan
+                  for name in names if name in NAN_IF_EMPTY}
+
+    def parse(lines):
+        return np.loadtxt(lines, delimiter=",", usecols=usecols, dtype=dtype,
+                          converters=converters or None, ndmin=1, encoding="utf-8")
+
+    if not mmap:
+        with open(path, encoding="utf-8") as f:
+            f.readline()
+            table = parse(f)
+        arrays = {name: np.ascontiguousarray(table[name]) for name in names}
+        if out_dir is not None:
+            for name, array in arrays.items():
+                tmp = _temp_path(out_dir, name)
+                with open(tmp, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp, os.path.join(out_dir, name + ".npy"))
+        return arrays
+
+    if out_dir is None:
+        out_dir = tempfile.mkdtemp(prefix="columns-")
+        atexit.register(shutil.rmtree, out_dir, True)
+    appenders = {name: spin2_io.NpyAppender(_temp_path(out_dir, name), (), dt)
+                 for name, dt in dtype}
+    with open(path, encoding="utf-8") as f:
+        f.readline()
+        while True:
+            block = list(itertools.islice(f, MMAP_BLOCK_ROWS))
+            if not block:
+                break
+            table = parse(block)
+            for name in names:
+                appenders[name].append(table[name])
+    arrays = {}
+    for name, appender in appenders.items():
+        appender.close()
+        final = os.path.join(out_dir, name + ".npy")
+        os.replace(appender.path, final)
+        arrays[name] = np.load(final, mmap_mode="r")
+    return arrays
+
+
+def read_columns(path, columns=None, mmap=None, cache=True):
+    """
+    Parse a CSV data file in a single pass into typed arrays.  Returns a
+    dict with one array per column: all of them, or only those named in
+    columns (the others are skipped by the parser).
+
+    With cache, columns parsed before from a file with the same contents
+    are loaded from the binary cache and the text is not parsed at all;
+    newly parsed columns are added to the cache.
+
+    With mmap (the default for files larger than MMAP_THRESHOLD) the file
+    is parsed block by block into one .npy file per column, and the
+    columns are returned as read-only memory maps, so no more than one
+    block of rows is ever held in memory.
+    """
+    if mmap is None:
+        mmap = os.path.getsize(path) > MMAP_THRESHOLD
+    names = _read_header(path) if columns is None else list(columns)
+    entry = None
+    todo = names
+    if cache:
+        entry = os.path.join(CACHE_DIR, content_key(path))
+        os.makedirs(entry, exist_ok=True)
+        todo = [name for name in names
+                if not os.path.exists(os.path.join(entry, name + ".npy"))]
+
+    arrays = _parse_csv(path, todo, mmap, entry) if todo else {}
+    if cache:
+        # The entry's mtime marks its last use for LRU eviction
+        os.utime(entry)
+        evict_cache(keep=entry)
+        for name in names:
+            if name not in arrays:
+                arrays[name] = np.load(os.path.join(entry, name + ".npy"),
+                                       mmap_mode="r" if mmap else None)
+    return {name: arrays[name] for name in names}
+
+
+def healthy_band_path():
+    """Path of the healthy-band scan: the binary scan if present, else the CSV."""
+    binary = os.path.join(DATA_DIR, "healthy_band_scan.hbs")
+    if os.path.exists(binary):
+        return binary
+    return os.path.join(DATA_DIR, "healthy_band_scan.csv")
+
+
+def load_healthy_band(columns=None, mmap=None):
     path = os.path.join(DATA_DIR, "healthy_band_scan.csv")
-    rows = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(r)
-
-    Pprime = [float(r["Pprime"]) for r in rows]
-    P2prime = [float(r["P2prime"]) for r in rows]
-    Zs     = [float(r["Zs"])     for r in rows]
-    Zt     = [float(r["Zt"])     for r in rows]
-    ghost_ok = [int(r["ghost_ok"]) for r in rows]
-    grad_ok  = [int(r["grad_ok"])  for r in rows]
-    return Pprime, P2prime, Zs, Zt, ghost_ok, grad_ok
-
-
-def load_spin2_F2():
+    band = read_columns(path, columns, mmap)
+    return band, scan_healthy_band.read_sidecar(path)
+
+
+def load_healthy_band_binary():
+    path = os.path.join(DATA_DIR, "healthy_band_scan.hbs")
+    if not os.path.exists(path):
+        return None
+    scan = healthy_band_io.load_scan(path)
+    points = healthy_band_io.sample_points(scan, MAX_SCATTER_POINTS)
+    n1, n2 = scan["shape"]
+    counts = {
+        "total": n1 * n2,
+        "n_stable": healthy_band_io.count_bits(scan["ghost_ok"], scan["grad_ok"]),
+        "window": (float(scan["Pprime"][0]), float(scan["Pprime"][-1]),
+                   float(scan["P2prime"][0]), float(scan["P2prime"][-1])),
+    }
+    config = {key: scan[key] for key in ("X0", "pprime", "p2prime")}
+    return points, counts, config
+
+
+def healthy_band_counts(Pprime, P2prime, ghost_ok, grad_ok):
+    total = len(Pprime)
+    n_stable = int(np.count_nonzero((ghost_ok == 1) & (grad_ok == 1)))
+    window = (float(Pprime.min()), float(Pprime.max()),
+              float(P2prime.min()), float(P2prime.max())) if total else None
+    return {"total": total, "n_stable": n_stable, "window": window}
+
+
+def load_healthy_band_cells():
+    path = os.path.join(DATA_DIR, "healthy_band_cells.csv")
+    if not os.path.exists(path):
+        return None
+    cells = read_columns(path, ["Pprime_min", "Pprime_max", "P2prime_min",
+                                "P2prime_max", "ghost_ok", "grad_ok"])
+    bounds = np.column_stack([cells["Pprime_min"], cells["Pprime_max"],
+                              cells["P2prime_min"], cells["P2prime_max"]])
+    return bounds, cells["ghost_ok"], cells["grad_ok"]
+
+
+def load_healthy_band_sweep():
+    path = os.path.join(DATA_DIR, "healthy_band_X0_sweep.csv")
+    if not os.path.exists(path):
+        return None
+    return read_columns(path, ["X0", "frac_stable", "frac_exact",
+                               "slope_boundary", "slope_exact"])
+
+
+def load_healthy_band_qmc():
+    path = os.path.join(DATA_DIR, "healthy_band_qmc.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_healthy_band_cs2():
+    path = scan_healthy_band.summary_path(healthy_band_path())
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_spin2_F2(columns=None, mmap=None):
     path = os.path.join(DATA_DIR, "spin2_F2_samples.csv")
-    rows = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(r)
+    return read_columns(path, columns, mmap)
 
-    omega = [float(r["omega"]) for r in rows]
-    kx    = [float(r["kx"])    for r in rows]
-    ky    = [float(r["ky"])    for r in rows]
-    kz    = [float(r["kz"])    for r in rows]
-    k2    = [float(r["k2"])    for r in rows]
-    F2    = [float(r["F2"])    for r in rows]
-    return omega, kx, ky, kz, k2, F2
 
+# ---------- Plotting ----------
 
-# ---------- Healthy band figure & table ----------
+def pyplot():
+    """
+    Import matplotlib.pyplot on first use, forcing the non-interactive Agg
+    backend, so that runs building only tables never import matplotlib.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
 
-def make_fig_healthy_band(Pprime, P2prime, ghost_ok, grad_ok):
-    X0 = 1.0  # same as in scan_healthy_band.py
-    x_vals = Pprime
-    y_vals = [p + 2.0 * X0 * p2 for p, p2 in zip(Pprime, P2prime)]
 
-    stable_mask   = [ (g==1 and r==1) for g, r in zip(ghost_ok, grad_ok) ]
-    unstable_mask = [ not s for s in stable_mask ]
+# ---------- Healthy band figure & table ----------
 
-    x_stable  = [x for x, s in zip(x_vals, stable_mask)   if s]
-    y_stable  = [y for y, s in zip(y_vals, stable_mask)   if s]
-    x_unst    = [x for x, s in zip(x_vals, unstable_mask) if s]
-    y_unst    = [y for y, s in zip(y_vals, unstable_mask) if s]
+def make_fig_healthy_band(Pprime, P2prime, ghost_ok, grad_ok, X0):
+    plt = pyplot()
+    x_vals = np.asarray(Pprime)
+    y_vals = x_vals + 2.0 * X0 * np.asarray(P2prime)
+    stable_mask = (np.asarray(ghost_ok) == 1) & (np.asarray(grad_ok) == 1)
 
     plt.figure()
-    if x_unst:
-        plt.scatter(x_unst, y_unst, s=10, alpha=0.4, label="unstable")
-    if x_stable:
-        plt.scatter(x_stable, y_stable, s=10, alpha=0.8, label="healthy band")
+    if not stable_mask.all():
+        plt.scatter(x_vals[~stable_mask], y_vals[~stable_mask], s=10, alpha=0.4,
+                    label="unstable")
+    if stable_mask.any():
+        plt.scatter(x_vals[stable_mask], y_vals[stable_mask], s=10, alpha=0.8,
+                    label="healthy band")
     plt.axhline(0.0, linestyle="--")
     plt.axvline(0.0, linestyle="--")
     plt.xlabel("P'(X0)")
@@ -99,20 +399,105 @@ def make_fig_healthy_band(Pprime, P2prime, ghost_ok, grad_ok):
 
     out_path = os.path.join(FIG_DIR, "fig_healthy_band_scan.png")
     plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
+    plt.savefig(out_path, dpi=FIG_DPI)
     plt.close()
     print(f"Wrote healthy band figure to {out_path}")
 
 
-def make_table_healthy_band_stats(Pprime, ghost_ok, grad_ok):
-    total = len(Pprime)
-    stable_mask = [ (g==1 and r==1) for g, r in zip(ghost_ok, grad_ok) ]
-    n_stable = sum(1 for s in stable_mask if s)
+def make_fig_healthy_band_cells(cells, ghost_ok, grad_ok):
+    plt = pyplot()
+    from matplotlib.collections import PolyCollection
+
+    # Leaves of the adaptive quadtree, drawn as rectangles in (P', P'')
+    x0, x1, y0, y1 = cells.T
+    polys = np.stack([np.column_stack(corner) for corner in
+                      ((x0, y0), (x1, y0), (x1, y1), (x0, y1))], axis=1)
+    boundary = ghost_ok < 0
+    stable = (ghost_ok == 1) & (grad_ok == 1)
+    groups = {"unstable": polys[~boundary & ~stable],
+              "healthy band": polys[stable],
+              "boundary": polys[boundary]}
+
+    colors = {"unstable": "C0", "healthy band": "C1", "boundary": "k"}
+    fig, ax = plt.subplots()
+    for key, polys in groups.items():
+        if len(polys):
+            ax.add_collection(PolyCollection(polys, facecolors=colors[key],
+                                             edgecolors="none", alpha=0.6,
+                                             label=key))
+    ax.autoscale_view()
+    ax.axhline(0.0, linestyle="--")
+    ax.axvline(0.0, linestyle="--")
+    ax.set_xlabel("P'(X0)")
+    ax.set_ylabel("P''(X0)")
+    ax.set_title("Adaptive quadtree cells of the healthy-band scan")
+    # The cells cover the whole window, so loc="best" would only cost time
+    # testing every position against tens of thousands of rectangles
+    ax.legend(loc="upper left")
+
+    out_path = os.path.join(FIG_DIR, "fig_healthy_band_cells.png")
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=FIG_DPI)
+    plt.close(fig)
+    print(f"Wrote healthy band cells figure to {out_path}")
+
+
+def make_fig_healthy_band_sweep(sweep):
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(2, 1, sharex=True)
+    ax1.plot(sweep["X0"], sweep["frac_stable"], "o", label="grid")
+    ax1.plot(sweep["X0"], sweep["frac_exact"], "-", label="exact area")
+    ax1.set_ylabel("Fraction stable")
+    ax1.legend(loc="best")
+    ax2.plot(sweep["X0"], sweep["slope_boundary"], "o", label="grid")
+    ax2.plot(sweep["X0"], sweep["slope_exact"], "-", label=r"$-1/(2X_0)$")
+    ax2.set_xlabel(r"$X_0$")
+    ax2.set_ylabel(r"$Z_t=0$ slope $dP''/dP'$")
+    ax2.legend(loc="best")
+    ax1.set_title("Healthy band vs background scale $X_0$")
+
+    out_path = os.path.join(FIG_DIR, "fig_healthy_band_X0_sweep.png")
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=FIG_DPI)
+    plt.close(fig)
+    print(f"Wrote healthy band X0 sweep figure to {out_path}")
+
+
+def make_fig_healthy_band_cs2(summary):
+    plt = pyplot()
+    edges = summary["edges"]
+    widths = [hi - lo for lo, hi in zip(edges[:-1], edges[1:])]
+    fig, ax = plt.subplots()
+    ax.bar(edges[:-1], summary["counts"], width=widths, align="edge")
+    ax.set_xscale("log")
+    ax.axvline(1.0, linestyle="--", label=r"$c_s^2=1$")
+    ax.axvline(summary["cs2_strong"], linestyle=":", color="k",
+               label=rf"$c_s^2={summary['cs2_strong']:g}$")
+    ax.set_xlabel(r"$c_s^2 = Z_s/Z_t$")
+    ax.set_ylabel("Stable grid points")
+    ax.set_title("Sound speed in the healthy band")
+    ax.legend(loc="best")
+
+    out_path = os.path.join(FIG_DIR, "fig_healthy_band_cs2.png")
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=FIG_DPI)
+    plt.close(fig)
+    print(f"Wrote healthy band c_s^2 figure to {out_path}")
+
+
+def make_table_healthy_band_stats(counts, X0, source="data/healthy_band_scan.csv", qmc=None,
+                                  cs2=None):
+    total, n_stable = counts["total"], counts["n_stable"]
     frac_stable = n_stable / total if total > 0 else float("nan")
+    # Exact area fraction of the stable polygon over the same window
+    if total > 0:
+        _, _, frac_exact = healthy_band_region.stable_region(X0, *counts["window"])
+    else:
+        frac_exact = float("nan")
 
     out_path = os.path.join(RES_DIR, "table_healthy_band_stats.tex")
     with open(out_path, "w", encoding="utf-8") as f:
-        f.write("% Auto-generated from data/healthy_band_scan.csv\n")
+        f.write(f"% Auto-generated from {source}\n")
         f.write("\\begin{table}[t]\n")
         f.write("  \\centering\n")
         f.write("  \\begin{tabular}{l c}\n")
@@ -122,6 +507,15 @@ def make_table_healthy_band_stats(Pprime, ghost_ok, grad_ok):
         f.write(f"    Total grid points & {total} \\\\\n")
         f.write(f"    Stable points ($Z_t>0$, $Z_s>0$) & {n_stable} \\\\\n")
         f.write(f"    Fraction stable & {frac_stable:.3f} \\\\\n")
+        f.write(f"    Fraction stable (exact area) & {frac_exact:.4f} \\\\\n")
+        if qmc is not None:
+            f.write(f"    Fraction stable (QMC, 95\\% CI) & "
+                    f"${qmc['estimate']:.5f} \\pm {qmc['half_width']:.5f}$ \\\\\n")
+            f.write(f"    QMC points & {qmc['points']} \\\\\n")
+        if cs2 is not None:
+            f.write(f"    Superluminal ($c_s^2>1$) & {cs2['n_superluminal']} \\\\\n")
+            f.write(f"    Strong coupling ($c_s^2<{cs2['cs2_strong']:g}$) & "
+                    f"{cs2['n_strong_coupling']} \\\\\n")
         f.write("    \\hline\\hline\n")
         f.write("  \\end{tabular}\n")
         f.write("  \\caption{Summary of the healthy-band scan in the\n")
@@ -134,6 +528,7 @@ def make_table_healthy_band_stats(Pprime, ghost_ok, grad_ok):
 # ---------- Spin-2 F2 figure & table ----------
 
 def make_fig_spin2_F2(k2, F2):
+    plt = pyplot()
     plt.figure()
     plt.scatter(k2, F2, s=40)
     plt.axhline(0.0, linestyle="--")
@@ -143,19 +538,19 @@ def make_fig_spin2_F2(k2, F2):
 
     out_path = os.path.join(FIG_DIR, "fig_spin2_F2_vs_k2.png")
     plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
+    plt.savefig(out_path, dpi=FIG_DPI)
     plt.close()
     print(f"Wrote spin-2 F2 figure to {out_path}")
 
 
 def make_table_spin2_F2_stats(F2):
     total = len(F2)
-    n_pos  = sum(1 for v in F2 if v > 0.0)
-    n_neg  = sum(1 for v in F2 if v < 0.0)
-    n_zero = sum(1 for v in F2 if abs(v) < 1e-12)
+    n_pos  = int(np.count_nonzero(F2 > 0.0))
+    n_neg  = int(np.count_nonzero(F2 < 0.0))
+    n_zero = int(np.count_nonzero(np.abs(F2) < 1e-12))
     if total > 0:
-        F2_min = min(F2)
-        F2_max = max(F2)
+        F2_min = float(F2.min())
+        F2_max = float(F2.max())
     else:
         F2_min = float("nan")
         F2_max = float("nan")
@@ -185,20 +580,227 @@ def make_table_spin2_F2_stats(F2):
     print(f"Wrote spin-2 F2 stats table to {out_path}")
 
 
-# ---------- Main ----------
+# ---------- Incremental build ----------
+
+class Artifact:
+    """
+    A generated figure or table (kind "figure" or "table"): the function
+    that builds it, its output files, and the input files and parameters
+    it depends on.
+    """
+
+    def __init__(self, name, kind, build, outputs, inputs, params=None):
+        self.name = name
+        self.kind = kind
+        self.build = build
+        self.outputs = outputs
+        self.inputs = inputs
+        self.params = params or {}
+
+    def record(self, script_hash):
+        """Return the build record: script version, input hashes and parameters."""
+        return {"script": script_hash,
+                "inputs": {os.path.relpath(path, PROJECT_ROOT): file_hash(path)
+                           for path in self.inputs},
+                "params": self.params}
+
+    def is_current(self, record, manifest):
+        return (manifest.get(self.name) == record
+                and all(os.path.exists(path) for path in self.outputs))
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    return _digest_file(hashlib.sha256(), path).hexdigest()
+
+
+def timed_build(build):
+    """Run a build function and return its wall time in seconds."""
+    start = time.perf_counter()
+    build()
+    return time.perf_counter() - start
+
 
-def main():
-    # Healthy band
-    Pprime, P2prime, Zs, Zt, ghost_ok, grad_ok = load_healthy_band()
-    make_fig_healthy_band(Pprime, P2prime, ghost_ok, grad_ok)
-    make_table_healthy_band_stats(Pprime, ghost_ok, grad_ok)
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
 
-    # Spin-2 F2
-    omega, kx, ky, kz, k2, F2 = load_spin2_F2()
-    make_fig_spin2_F2(k2, F2)
-    make_table_spin2_F2_stats(F2)
 
-    print("All figures and tables generated.")
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+@functools.cache
+def healthy_band_data():
+    """
+    Return (points, counts, config, source) of the healthy-band scan, binary
+    if present; config holds its X0 and (P', P'') ranges.
+    """
+    binary = load_healthy_band_binary()
+    if binary is not None:
+        points, counts, config = binary
+        return points, counts, config, "data/healthy_band_scan.hbs"
+    band, config = load_healthy_band(["Pprime", "P2prime", "ghost_ok", "grad_ok"])
+    points = tuple(band.values())
+    return points, healthy_band_counts(*points), config, "data/healthy_band_scan.csv"
+
+
+def describes_scan(info, config):
+    """
+    True if a QMC estimate or c_s^2 summary was computed for the X0 and
+    (P', P'') window of the scan with this config (the steps may differ).
+    """
+    return (info.get("X0") == config["X0"]
+            and list(info.get("pprime", ()))[:2] == list(config["pprime"])[:2]
+            and list(info.get("p2prime", ()))[:2] == list(config["p2prime"])[:2])
+
+
+def build_fig_healthy_band():
+    points, _, config, _ = healthy_band_data()
+    make_fig_healthy_band(*points, config["X0"])
+
+
+def build_table_healthy_band_stats():
+    _, counts, config, source = healthy_band_data()
+    extras = {"QMC estimate": load_healthy_band_qmc(), "c_s^2 summary": load_healthy_band_cs2()}
+    for label, info in extras.items():
+        if info is not None and not describes_scan(info, config):
+            print(f"Ignoring the {label}: it was computed for a different X0 or "
+                  f"window than {source}")
+            extras[label] = None
+    make_table_healthy_band_stats(counts, config["X0"], source, *extras.values())
+
+
+def build_fig_healthy_band_cs2():
+    make_fig_healthy_band_cs2(load_healthy_band_cs2())
+
+
+def build_fig_healthy_band_cells():
+    make_fig_healthy_band_cells(*load_healthy_band_cells())
+
+
+def build_fig_healthy_band_sweep():
+    make_fig_healthy_band_sweep(load_healthy_band_sweep())
+
+
+def build_fig_spin2_F2():
+    spin2 = load_spin2_F2(["k2", "F2"])
+    make_fig_spin2_F2(spin2["k2"], spin2["F2"])
+
+
+def build_table_spin2_F2_stats():
+    make_table_spin2_F2_stats(load_spin2_F2(["F2"])["F2"])
+
+
+def artifacts():
+    """Return the artifacts that can be built from the files present in data/."""
+    def data(name):
+        return os.path.join(DATA_DIR, name)
+
+    def script(name):
+        return os.path.join(ROOT, name)
+
+    source = healthy_band_path()
+    if source.endswith(".hbs"):
+        band = [source, script("healthy_band_io.py")]
+    else:
+        band = [source, source + ".json"]
+    summary = scan_healthy_band.summary_path(source)
+    figure = {"dpi": FIG_DPI}
+
+    out = [
+        Artifact("fig_healthy_band_scan", "figure", build_fig_healthy_band,
+                 [os.path.join(FIG_DIR, "fig_healthy_band_scan.png")], band,
+                 dict(figure, max_scatter_points=MAX_SCATTER_POINTS)),
+        Artifact("table_healthy_band_stats", "table", build_table_healthy_band_stats,
+                 [os.path.join(RES_DIR, "table_healthy_band_stats.tex")],
+                 band + [data("healthy_band_qmc.json"), summary,
+                         script("healthy_band_region.py")]),
+    ]
+    if os.path.exists(summary):
+        out.append(Artifact("fig_healthy_band_cs2", "figure", build_fig_healthy_band_cs2,
+                            [os.path.join(FIG_DIR, "fig_healthy_band_cs2.png")],
+                            [summary], figure))
+    if os.path.exists(data("healthy_band_cells.csv")):
+        out.append(Artifact("fig_healthy_band_cells", "figure", build_fig_healthy_band_cells,
+                            [os.path.join(FIG_DIR, "fig_healthy_band_cells.png")],
+                            [data("healthy_band_cells.csv")], figure))
+    if os.path.exists(data("healthy_band_X0_sweep.csv")):
+        out.append(Artifact("fig_healthy_band_X0_sweep", "figure",
+                            build_fig_healthy_band_sweep,
+                            [os.path.join(FIG_DIR, "fig_healthy_band_X0_sweep.png")],
+                            [data("healthy_band_X0_sweep.csv")], figure))
+    out += [
+        Artifact("fig_spin2_F2_vs_k2", "figure", build_fig_spin2_F2,
+                 [os.path.join(FIG_DIR, "fig_spin2_F2_vs_k2.png")],
+                 [data("spin2_F2_samples.csv")], figure),
+        Artifact("table_spin2_F2_stats", "table", build_table_spin2_F2_stats,
+                 [os.path.join(RES_DIR, "table_spin2_F2_stats.tex")],
+                 [data("spin2_F2_samples.csv")]),
+    ]
+    return out
+
+
+# ---------- Main ----------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    only = parser.add_mutually_exclusive_group()
+    only.add_argument("--tables-only", dest="kind", action="store_const", const="table",
+                      help="build only the LaTeX tables (matplotlib is never imported)")
+    only.add_argument("--figures-only", dest="kind", action="store_const", const="figure",
+                      help="build only the figures")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild every artifact, even those that are up to date")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes rendering artifacts in parallel "
+                             "(default: CPU count; 1 builds in this process)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    script_hash = file_hash(os.path.abspath(__file__))
+    manifest = load_manifest()
+    stale, skipped = [], []
+    for artifact in artifacts():
+        if args.kind is not None and artifact.kind != args.kind:
+            continue
+        record = artifact.record(script_hash)
+        if not args.force and artifact.is_current(record, manifest):
+            skipped.append(artifact.name)
+        else:
+            stale.append((artifact, record))
+
+    def done(artifact, record, seconds):
+        print(f"  {artifact.name}: {seconds:.2f} s")
+        manifest[artifact.name] = record
+        save_manifest(manifest)
+
+    start = time.perf_counter()
+    if args.jobs > 1 and len(stale) > 1:
+        # Separate processes, since pyplot keeps global state
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(stale))) as pool:
+            futures = {pool.submit(timed_build, artifact.build): (artifact, record)
+                       for artifact, record in stale}
+            for future in as_completed(futures):
+                done(*futures[future], future.result())
+    else:
+        for artifact, record in stale:
+            done(artifact, record, timed_build(artifact.build))
+
+    print(f"Built {len(stale)} artifact(s) in {time.perf_counter() - start:.2f} s.")
+    if skipped:
+        print(f"Skipped {len(skipped)} up to date: " + ", ".join(skipped))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+"""
+Checkpoints for resumable scans.
+
+A long scan writes its output one chunk at a time.  After every chunk the
+output is flushed to disk and a small JSON checkpoint (OUT.ckpt) is
+replaced atomically; it records the scan configuration, where the next
+chunk starts, the output size at that point and the partial statistics.
+If the job is killed, a rerun with --resume truncates the output back to
+the recorded size (dropping any half-written chunk), restores the
+statistics and continues with the next chunk, so no chunk is evaluated
+twice and no row is duplicated.  The checkpoint is removed once the scan
+completes.
+"""
+
+import json
+import os
+
+
+def checkpoint_path(out_path):
+    return out_path + ".ckpt"
+
+
+def sync(f):
+    """Flush a file object all the way to disk."""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _normalise(config):
+    # Compare configurations as they round-trip through JSON (tuples -> lists)
+    return json.loads(json.dumps(config))
+
+
+class Checkpoint:
+    """The checkpoint of one output file, tied to the configuration that produced it."""
+
+    def __init__(self, out_path, config):
+        self.path = checkpoint_path(out_path)
+        self.config = _normalise(config)
+
+    def load(self):
+        """
+        Return the saved state, or None if there is no checkpoint.  A
+        checkpoint written for a different configuration is an error.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        if saved["config"] != self.config:
+            raise ValueError("%s was written for a different scan configuration; "
+                             "rerun without --resume to start over" % self.path)
+        return saved["state"]
+
+    def save(self, **state):
+        """Atomically replace the checkpoint with the given state."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"config": self.config, "state": state}, f)
+            sync(f)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def open_output(path, state):
+    """
+    Open path for binary writing: truncated to the size recorded in state
+    when resuming, fresh otherwise.
+    """
+    if state is None:
+        return open(path, "wb")
+    f = open(path, "r+b")
+    f.truncate(state["bytes"])
+    f.seek(0, os.SEEK_END)
+    return f
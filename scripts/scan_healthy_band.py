@@ -8,11 +8,34 @@ Scan a simple grid in (Pprime, P2prime) and check the healthy-band conditions:
 
 Here X0 is treated as a fixed positive number setting the background scale.
 This script is purely illustrative and does not assume a specific P(X).
+
+Grid values are built from integer indices as exact multiples of the step,
+so there is no accumulated drift and points on the Z_s = 0 and Z_t = 0
+lines are classified exactly.  The conditions are evaluated as array
+operations over whole rows of the grid at a time.
+
+With --adaptive the uniform grid is replaced by a quadtree over the scan
+window: a cell is split only while its four corners disagree on ghost_ok
+or grad_ok, down to --min-cell.  Both conditions are half-planes, so a
+cell whose corners agree lies entirely on one side of both boundaries and
+needs no further evaluation; the work scales with the boundary length
+rather than the window area.  The leaves are written as a cell list
+(one rectangle per row, ghost_ok/grad_ok = -1 on unresolved boundary
+cells) that the plotting script draws directly.
 """
 
-import csv
+import argparse
+import json
 import math
 
+import numpy as np
+
+import healthy_band_io
+import healthy_band_models
+import healthy_band_qmc
+import healthy_band_region
+import scan_checkpoint
+
 # Background X0 (choose a representative positive value)
 X0 = 1.0
 
@@ -21,34 +44,642 @@ PPRIME_MIN, PPRIME_MAX, PPRIME_STEP = -2.0, 2.0, 0.1
 P2PRIME_MIN, P2PRIME_MAX, P2PRIME_STEP = -2.0, 2.0, 0.1
 
 out_path = "data/healthy_band_scan.csv"
+binary_path = "data/healthy_band_scan.hbs"
+sparse_path = "data/healthy_band_scan.sparse"
+cells_path = "data/healthy_band_cells.csv"
+sweep_path = "data/healthy_band_X0_sweep.csv"
+models_path = "data/healthy_band_models.csv"
+qmc_path = "data/healthy_band_qmc.json"
+
+CSV_HEADER = "Pprime,P2prime,Zs,Zt,cs2,ghost_ok,grad_ok\r\n"
+CELLS_HEADER = "Pprime_min,Pprime_max,P2prime_min,P2prime_max,level,ghost_ok,grad_ok\r\n"
+SWEEP_HEADER = ("X0,n_points,n_stable,frac_stable,frac_exact,"
+                "slope_boundary,slope_exact\r\n")
+
+MODELS_HEADER = "model,X0,n_samples,n_valid,n_ghost_ok,n_grad_ok,n_stable,frac_stable\r\n"
+
+# Stable points with c_s^2 below this are flagged as strongly coupled
+CS2_STRONG_COUPLING = 1e-2
+
+# Default X0 sweep (min, max, step)
+X0_SWEEP = (0.25, 4.0, 0.25)
+
+# Parameter vectors per model scan, and per batch
+MODEL_SAMPLES = 1_000_000
+MODEL_BATCH = 1_000_000
+
+# Parameter vectors on which each model's derivatives are checked against P
+DERIV_CHECK_SAMPLES = 10_000
+
+# Smallest quadtree cell edge in adaptive mode
+MIN_CELL = 1e-3
+
+# Quadtree leaves formatted and written per block
+CELLS_PER_BLOCK = 250_000
+
+# Grid rows (fixed Pprime) evaluated and written per chunk; a multiple of 8
+# so that chunks of the binary format start on whole bytes of packed flags
+ROWS_PER_CHUNK = 256
+
+
+def range_lattice(vmin, vmax, step):
+    """
+    Return the integers (n_lo, n_hi) with vmin = n_lo * step and
+    vmax = n_hi * step.  The step must be positive, vmin <= vmax, and
+    both endpoints must lie on the step lattice.
+    """
+    if not step > 0:
+        raise ValueError("scan step must be positive, got %g" % step)
+    if vmin > vmax:
+        raise ValueError("scan range [%g, %g] is empty (min > max)" % (vmin, vmax))
+    n_lo = round(vmin / step)
+    n_hi = round(vmax / step)
+    if not (math.isclose(vmin / step, n_lo, abs_tol=1e-6)
+            and math.isclose(vmax / step, n_hi, abs_tol=1e-6)):
+        raise ValueError("scan range [%g, %g] is not a multiple of step %g"
+                         % (vmin, vmax, step))
+    return n_lo, n_hi
+
+
+def grid_axis(vmin, vmax, step):
+    """
+    Return the axis values vmin, vmin + step, ..., vmax as integer multiples
+    of step (see range_lattice).
+    """
+    n_lo, n_hi = range_lattice(vmin, vmax, step)
+    return np.arange(n_lo, n_hi + 1) * step
+
+
+def classify(Pprime, P2prime, X0=X0, cs2_strong=CS2_STRONG_COUPLING):
+    """
+    Evaluate the healthy-band conditions elementwise (X0 may be an array
+    broadcast against P' and P''); return a dict of arrays Zs, Zt, cs2
+    (NaN where Z_t <= 0), ghost_ok and grad_ok, and for the stable points
+    the flags superluminal (c_s^2 > 1) and strong_coupling
+    (c_s^2 < cs2_strong).
+    """
+    Pprime, P2prime, X0 = np.broadcast_arrays(np.asarray(Pprime, dtype=float),
+                                              np.asarray(P2prime, dtype=float),
+                                              np.asarray(X0, dtype=float))
+    Zs = Pprime
+    Zt = Pprime + 2.0 * X0 * P2prime
+    ghost_ok = Zt > 0.0
+    grad_ok = Zs > 0.0
+    cs2 = np.full(Zs.shape, np.nan)
+    np.divide(Zs, Zt, out=cs2, where=ghost_ok)
+    stable = ghost_ok & grad_ok
+    return {"Zs": Zs, "Zt": Zt, "cs2": cs2, "ghost_ok": ghost_ok, "grad_ok": grad_ok,
+            "superluminal": stable & (cs2 > 1.0),
+            "strong_coupling": stable & (cs2 < cs2_strong)}
+
+
+def iter_chunks(Pprime_axis, P2prime_axis, X0=X0, rows_per_chunk=ROWS_PER_CHUNK, start=0,
+                cs2_strong=CS2_STRONG_COUPLING):
+    """
+    Yield (row slice, result) for blocks of whole grid rows from row start
+    on; result arrays have shape (rows, len(P2prime_axis)), i.e. CSV order
+    when flattened.
+    """
+    for lo in range(start, len(Pprime_axis), rows_per_chunk):
+        rows = slice(lo, min(lo + rows_per_chunk, len(Pprime_axis)))
+        Pp = Pprime_axis[rows, np.newaxis]
+        yield rows, classify(Pp, P2prime_axis[np.newaxis, :], X0, cs2_strong)
+
+
+def format_axis(values):
+    """Format axis values once; Pprime and Zs share these strings."""
+    return ["%.3f" % v for v in values.tolist()]
+
+
+def format_rows(Pprime_str, P2prime_str, result):
+    """
+    Return the CSV text of a block of grid rows in the historical .3f
+    layout, given the preformatted axis strings of the block.
+    """
+    lines = []
+    for i, prefix in enumerate(Pprime_str):
+        ghost = result["ghost_ok"][i].tolist()
+        cs2 = ["%.3f" % v if g else ""
+               for v, g in zip(result["cs2"][i].tolist(), ghost)]
+        lines.extend("%s,%s,%s,%.3f,%s,%d,%d\r\n" % (prefix, p2, prefix, zt, c, g, r)
+                     for p2, zt, c, g, r in zip(P2prime_str, result["Zt"][i].tolist(),
+                                                cs2, ghost, result["grad_ok"][i].tolist()))
+    return "".join(lines)
+
+
+def _corner_flags(ix, iy, pmin, p2min, dx, dy, n_fine, X0):
+    """Evaluate 2*ghost_ok + grad_ok once per distinct lattice point."""
+    keys = ix * (n_fine + 1) + iy
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    ux, uy = np.divmod(uniq, n_fine + 1)
+    result = classify(pmin + ux * dx, p2min + uy * dy, X0)
+    flags = result["ghost_ok"].astype(np.int8) * 2 + result["grad_ok"]
+    return flags[inverse], len(uniq)
+
+
+def iter_quadtree(pmin, pmax, p2min, p2max, X0=X0, min_cell=MIN_CELL,
+                  block_size=CELLS_PER_BLOCK):
+    """
+    Adaptively refine the window [pmin, pmax] x [p2min, p2max].
+
+    Cells are addressed by integer corners on the lattice of the finest
+    level and refined level by level as whole arrays; children inherit
+    their parent's corner flags, so each refinement evaluates only the
+    five new edge-midpoint and centre points (shared ones once).  Yields
+    (leaves, n_eval) in blocks of at most block_size leaves, where leaves is an (N,7) array of rows
+    (Pprime_min, Pprime_max, P2prime_min, P2prime_max, level, ghost_ok,
+    grad_ok), ghost_ok and grad_ok being -1 on finest-level cells whose
+    corners still disagree, and n_eval counts the points evaluated since
+    the previous block.
+    """
+    width, height = pmax - pmin, p2max - p2min
+    max_level = max(0, math.ceil(math.log2(max(width, height) / min_cell)))
+    n_fine = 2 ** max_level
+    lattice = (pmin, p2min, width / n_fine, height / n_fine, n_fine, X0)
+
+    ix = np.zeros(1, dtype=np.int64)
+    iy = np.zeros(1, dtype=np.int64)
+    # Corner flags in the order (00, 10, 01, 11)
+    corners, n_eval = _corner_flags(np.array([0, n_fine, 0, n_fine]),
+                                    np.array([0, 0, n_fine, n_fine]), *lattice)
+    corners = corners.reshape(4, 1)
+    for level in range(max_level + 1):
+        size = n_fine >> level
+        mixed = np.any(corners != corners[0], axis=0)
+        leaf = ~mixed if level < max_level else np.ones_like(mixed)
+
+        state = corners[0][leaf]
+        ghost = np.where(mixed[leaf], -1, state // 2)
+        grad = np.where(mixed[leaf], -1, state % 2)
+        x0, y0 = ix[leaf], iy[leaf]
+        for lo in range(0, max(len(x0), 1), block_size):
+            sl = slice(lo, lo + block_size)
+            yield np.column_stack([
+                pmin + x0[sl] * lattice[2], pmin + (x0[sl] + size) * lattice[2],
+                p2min + y0[sl] * lattice[3], p2min + (y0[sl] + size) * lattice[3],
+                np.full(len(x0[sl]), level), ghost[sl], grad[sl]]), n_eval
+            n_eval = 0
+        if level == max_level:
+            break
+
+        # Split the mixed cells: evaluate bottom, left, centre, right, top
+        half = size // 2
+        ix, iy, f = ix[mixed], iy[mixed], corners[:, mixed]
+        n = len(ix)
+        px = np.concatenate([ix + half, ix, ix + half, ix + size, ix + half])
+        py = np.concatenate([iy, iy + half, iy + half, iy + half, iy + size])
+        new, n_eval = _corner_flags(px, py, *lattice)
+        b, l, c, r, t = new.reshape(5, n)
+        corners = np.concatenate([
+            np.stack([f[0], b, l, c]), np.stack([b, f[1], c, r]),
+            np.stack([l, c, f[2], t]), np.stack([c, r, t, f[3]])], axis=1)
+        ix = np.concatenate([ix, ix + half, ix, ix + half])
+        iy = np.concatenate([iy, iy, iy + half, iy + half])
+
+
+def cell_area_bounds(cells):
+    """
+    Return (lower, upper) bounds on the stable area of a block of cells:
+    stable leaves only, and stable plus unresolved boundary leaves.
+    """
+    area = (cells[:, 1] - cells[:, 0]) * (cells[:, 3] - cells[:, 2])
+    stable = (cells[:, 5] == 1) & (cells[:, 6] == 1)
+    mixed = cells[:, 5] < 0
+    return float(np.sum(area[stable])), float(np.sum(area[stable | mixed]))
+
+
+def format_cells(cells):
+    """Return the CSV text of a cell list."""
+    return "".join("%r,%r,%r,%r,%d,%d,%d\r\n" % (x0, x1, y0, y1, lev, g, r)
+                   for x0, x1, y0, y1, lev, g, r in cells.tolist())
+
+
+def run_adaptive(args):
+    """Quadtree mode: write the leaf cells and report the area bracket."""
+    (pmin, pmax, _), (p2min, p2max, _) = args.pprime, args.p2prime
+    n_cells = n_eval = 0
+    lower = upper = 0.0
+    with open(args.cells_out, "w", newline="") as f:
+        f.write(CELLS_HEADER)
+        for cells, n_new in iter_quadtree(pmin, pmax, p2min, p2max,
+                                          args.X0, args.min_cell):
+            f.write(format_cells(cells))
+            lo, hi = cell_area_bounds(cells)
+            lower, upper = lower + lo, upper + hi
+            n_cells += len(cells)
+            n_eval += n_new
+
+    write_sidecar(args.cells_out, X0=args.X0, pprime=list(args.pprime),
+                  p2prime=list(args.p2prime), min_cell=args.min_cell)
+    window = (pmax - pmin) * (p2max - p2min)
+    _, _, frac_exact = healthy_band_region.stable_region(args.X0, pmin, pmax, p2min, p2max)
+    print(f"Written {n_cells} quadtree cells to {args.cells_out} "
+          f"({n_eval} evaluations)")
+    print(f"Stable fraction: cells [{lower / window:.6f}, {upper / window:.6f}], "
+          f"exact {frac_exact:.6f}")
+
+
+def sweep_X0(Pprime_axis, P2prime_axis, X0_axis, rows_per_chunk=ROWS_PER_CHUNK):
+    """
+    Evaluate the conditions on the (P', P'', X0) grid, blocked over P' rows,
+    and reduce per X0.  Returns a dict of arrays indexed like X0_axis:
+    n_stable, and slope_boundary, the least-squares slope of the Z_t = 0
+    boundary through the P' columns where it crosses the window (NaN if
+    fewer than two do).  The boundary in a column is placed half a step
+    below its first ghost-free point; Z_t increases with P'' for X0 > 0.
+    """
+    if np.any(X0_axis <= 0.0):
+        raise ValueError("X0 must be positive")
+    n_stable = np.zeros(len(X0_axis), dtype=np.int64)
+    n_ghost = []
+    for lo in range(0, len(Pprime_axis), rows_per_chunk):
+        # Arrays of shape (rows, len(P2prime_axis), len(X0_axis))
+        result = classify(Pprime_axis[lo:lo + rows_per_chunk, np.newaxis, np.newaxis],
+                          P2prime_axis[np.newaxis, :, np.newaxis],
+                          X0_axis[np.newaxis, np.newaxis, :])
+        n_stable += np.sum(result["ghost_ok"] & result["grad_ok"], axis=(0, 1))
+        n_ghost.append(np.sum(~result["ghost_ok"], axis=1))
+    n_ghost = np.concatenate(n_ghost)
+
+    step = P2prime_axis[1] - P2prime_axis[0]
+    crossing = (n_ghost > 0) & (n_ghost < len(P2prime_axis))
+    boundary = P2prime_axis[np.minimum(n_ghost, len(P2prime_axis) - 1)] - 0.5 * step
+    slope = np.full(len(X0_axis), np.nan)
+    for j in range(len(X0_axis)):
+        x = Pprime_axis[crossing[:, j]]
+        if len(x) >= 2:
+            slope[j] = np.polyfit(x, boundary[crossing[:, j], j], 1)[0]
+    return {"n_stable": n_stable, "slope_boundary": slope}
+
+
+def scan_model(model, X0=X0, n_samples=MODEL_SAMPLES, batch_size=MODEL_BATCH,
+               ranges=None, rng=None):
+    """
+    Sample n_samples parameter vectors of a P(X) model in batches and
+    classify each at X0.  Returns a dict of counts: n_samples, n_valid
+    (finite P' and P''), n_ghost_ok, n_grad_ok, n_stable.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    counts = dict.fromkeys(["n_samples", "n_valid", "n_ghost_ok", "n_grad_ok", "n_stable"], 0)
+    for lo in range(0, n_samples, batch_size):
+        theta = model.sample(rng, min(batch_size, n_samples - lo), ranges)
+        P1, P2 = model.derivatives(X0, theta)
+        result = classify(P1, P2, X0)
+        counts["n_samples"] += len(theta)
+        counts["n_valid"] += int(np.sum(np.isfinite(P1) & np.isfinite(P2)))
+        counts["n_ghost_ok"] += int(np.sum(result["ghost_ok"]))
+        counts["n_grad_ok"] += int(np.sum(result["grad_ok"]))
+        counts["n_stable"] += int(np.sum(result["ghost_ok"] & result["grad_ok"]))
+    return counts
+
+
+def run_models(args):
+    """Model mode: one summary row per P(X) family."""
+    # Check the closed-form derivatives against P first, on a separate sample
+    for name, ranges in args.param_ranges.items():
+        model = healthy_band_models.MODELS[name]
+        check = model.sample(np.random.default_rng(args.seed), DERIV_CHECK_SAMPLES, ranges)
+        dev = model.check_derivatives(args.X0, check)
+        if dev > healthy_band_models.DERIV_CHECK_RTOL:
+            raise ValueError("%s: derivatives disagree with finite differences of P "
+                             "(max relative deviation %.2e)" % (name, dev))
+
+    rng = np.random.default_rng(args.seed)
+    used = {}
+    with open(args.models_out, "w", newline="") as f:
+        f.write(MODELS_HEADER)
+        for name, ranges in args.param_ranges.items():
+            model = healthy_band_models.MODELS[name]
+            counts = scan_model(model, args.X0, args.samples, args.batch_size, ranges, rng)
+            frac = counts["n_stable"] / counts["n_samples"]
+            f.write("%s,%r,%d,%d,%d,%d,%d,%r\r\n" % (
+                name, args.X0, counts["n_samples"], counts["n_valid"],
+                counts["n_ghost_ok"], counts["n_grad_ok"], counts["n_stable"], frac))
+            print(f"{name}: {counts['n_stable']} / {counts['n_samples']} stable ({frac:.4f})")
+            used[name] = ranges
+    write_sidecar(args.models_out, X0=args.X0, seed=args.seed, samples=args.samples,
+                  ranges=used)
+    print(f"Written model scan to {args.models_out}")
+
+
+def run_qmc(args):
+    """QMC mode: estimate the stable fraction of the scan window."""
+    (pmin, pmax, _), (p2min, p2max, _) = args.pprime, args.p2prime
+
+    def stable(points):
+        result = classify(points[:, 0], points[:, 1], args.X0)
+        return result["ghost_ok"] & result["grad_ok"]
+
+    estimate = healthy_band_qmc.estimate_fraction(
+        stable, [pmin, p2min], [pmax, p2max], args.qmc_target, args.qmc_batch,
+        args.qmc_max, np.random.default_rng(args.seed))
+    _, _, frac_exact = healthy_band_region.stable_region(args.X0, pmin, pmax, p2min, p2max)
+    with open(args.qmc_out, "w", encoding="utf-8") as f:
+        json.dump({"X0": args.X0, "pprime": [pmin, pmax], "p2prime": [p2min, p2max],
+                   "seed": args.seed, **estimate}, f, indent=2)
+        f.write("\n")
+    status = "reached" if estimate["converged"] else "not reached"
+    print(f"QMC stable fraction: {estimate['estimate']:.6f} +- {estimate['half_width']:.2e} "
+          f"(95% CI, {estimate['points']} points, target {status}); exact {frac_exact:.6f}")
+    print(f"Written QMC estimate to {args.qmc_out}")
+
+
+def write_sidecar(path, **config):
+    """Record the configuration an output file was produced with in PATH.json."""
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+
+
+def summary_path(out):
+    """Path of the counts and c_s^2 histogram of the grid scan written to out."""
+    return out + ".cs2.json"
+
+
+def read_sidecar(path):
+    """
+    Return the configuration recorded next to an output file, falling back
+    to the module defaults for files written before sidecars existed.
+    """
+    config = {"X0": X0,
+              "pprime": [PPRIME_MIN, PPRIME_MAX, PPRIME_STEP],
+              "p2prime": [P2PRIME_MIN, P2PRIME_MAX, P2PRIME_STEP]}
+    try:
+        with open(path + ".json", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    return config
+
+
+def run_sweep(args):
+    """X0 sweep mode: write one row per X0."""
+    Pprime_axis = grid_axis(*args.pprime)
+    P2prime_axis = grid_axis(*args.p2prime)
+    X0_axis = grid_axis(*args.sweep_X0)
+    result = sweep_X0(Pprime_axis, P2prime_axis, X0_axis)
+
+    total = len(Pprime_axis) * len(P2prime_axis)
+    window = tuple(map(float, (Pprime_axis[0], Pprime_axis[-1],
+                               P2prime_axis[0], P2prime_axis[-1])))
+    with open(args.sweep_out, "w", newline="") as f:
+        f.write(SWEEP_HEADER)
+        for x0, n_stable, slope in zip(X0_axis.tolist(), result["n_stable"].tolist(),
+                                       result["slope_boundary"].tolist()):
+            _, _, frac_exact = healthy_band_region.stable_region(x0, *window)
+            f.write("%r,%d,%d,%r,%r,%r,%r\r\n" % (x0, total, n_stable, n_stable / total,
+                                                 frac_exact, slope, -1.0 / (2.0 * x0)))
+    write_sidecar(args.sweep_out, pprime=list(args.pprime), p2prime=list(args.p2prime),
+                  X0_sweep=list(args.sweep_X0))
+    print(f"Written X0 sweep ({len(X0_axis)} values) to {args.sweep_out}")
+
+
+def iter_sparse_chunks(sparse, rows_per_chunk=ROWS_PER_CHUNK):
+    """
+    Yield (row slice, result) from a sparse scan exactly as iter_chunks
+    yields them from a live scan: flags decoded from the runs, floats
+    recomputed from the axes and taken from the stored boundary records.
+    """
+    Pprime_axis = grid_axis(*sparse["pprime"])
+    P2prime_axis = grid_axis(*sparse["p2prime"])
+    for rows, result in iter_chunks(Pprime_axis, P2prime_axis, sparse["X0"], rows_per_chunk):
+        state = healthy_band_io.decode_runs(sparse, rows.start, rows.stop)
+        result["ghost_ok"] = state >= 2
+        result["grad_ok"] = (state % 2) == 1
+        first, last = np.searchsorted(sparse["rec_row"], [rows.start, rows.stop])
+        i = sparse["rec_row"][first:last] - rows.start
+        j = sparse["rec_col"][first:last]
+        result["Zt"][i, j] = sparse["rec_Zt"][first:last]
+        result["cs2"][i, j] = sparse["rec_cs2"][first:last]
+        yield rows, result
+
+
+def expand_sparse(path, out):
+    """Rebuild the full CSV grid scan from a sparse scan."""
+    sparse = healthy_band_io.load_sparse(path)
+    Pprime_str = format_axis(grid_axis(*sparse["pprime"]))
+    P2prime_str = format_axis(grid_axis(*sparse["p2prime"]))
+    with open(out, "w", newline="") as f:
+        f.write(CSV_HEADER)
+        for rows, result in iter_sparse_chunks(sparse):
+            f.write(format_rows(Pprime_str[rows], P2prime_str, result))
+    write_sidecar(out, X0=sparse["X0"], pprime=sparse["pprime"], p2prime=sparse["p2prime"])
+    print(f"Expanded {path} ({len(sparse['run_state'])} runs, "
+          f"{len(sparse['rec_Zt'])} boundary records) to {out}")
+
+
+def parse_range(text):
+    """argparse type for 'min:max:step', checked with range_lattice."""
+    parts = text.split(":")
+    try:
+        if len(parts) != 3:
+            raise ValueError("range must be 'min:max:step', got %r" % text)
+        vmin, vmax, step = (float(x) for x in parts)
+        range_lattice(vmin, vmax, step)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+    return vmin, vmax, step
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scan the healthy-band conditions on a (P', P'') grid.",
+        epilog="Ranges are MIN:MAX:STEP with both ends on the STEP lattice.  Attach "
+               "ranges that start with a minus sign with '=', e.g. --pprime=-2:2:0.1; "
+               "argparse reads '--pprime -2:2:0.1' as an option.")
+    parser.add_argument("--out", default=None,
+                        help="output path (default %s, %s with --format binary, "
+                             "%s with --format sparse)" % (out_path, binary_path, sparse_path))
+    parser.add_argument("--format", choices=["csv", "binary", "sparse"], default=None,
+                        help="grid scan output format (default csv)")
+    parser.add_argument("--eps", type=float, default=None,
+                        help="sparse format: keep full records where |Z_s| or |Z_t| "
+                             "<= eps (default: the larger grid step)")
+    # Each of these selects a mode other than the grid scan
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--expand-sparse", metavar="PATH",
+                        help="rebuild the full CSV scan (--out) from a sparse scan")
+    parser.add_argument("--cs2-strong", type=float, default=None,
+                        help="flag stable points with c_s^2 below this as strongly "
+                             "coupled (default %g)" % CS2_STRONG_COUPLING)
+    parser.add_argument("--summary-out", default=None,
+                        help="output JSON path of the grid scan counts and c_s^2 "
+                             "histogram (default OUT.cs2.json)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted grid scan from its checkpoint")
+    parser.add_argument("--X0", type=float, default=X0, help="background X0")
+    parser.add_argument("--pprime", type=parse_range, metavar="MIN:MAX:STEP",
+                        default=(PPRIME_MIN, PPRIME_MAX, PPRIME_STEP),
+                        help="P'(X0) range (write --pprime=-2:2:0.1 for a negative MIN)")
+    parser.add_argument("--p2prime", type=parse_range, metavar="MIN:MAX:STEP",
+                        default=(P2PRIME_MIN, P2PRIME_MAX, P2PRIME_STEP),
+                        help="P''(X0) range (write --p2prime=-2:2:0.1 for a negative MIN)")
+    modes.add_argument("--adaptive", action="store_true",
+                        help="refine the band boundary with a quadtree "
+                             "(the step of each range is ignored)")
+    parser.add_argument("--min-cell", type=float, default=MIN_CELL,
+                        help="smallest quadtree cell edge")
+    parser.add_argument("--cells-out", default=cells_path,
+                        help="output CSV path of the quadtree cell list")
+    modes.add_argument("--sweep-X0", type=parse_range, metavar="MIN:MAX:STEP",
+                        nargs="?", const=X0_SWEEP, default=None,
+                        help="sweep X0 as a third grid axis (default range %s)"
+                             % ":".join(map(str, X0_SWEEP)))
+    parser.add_argument("--sweep-out", default=sweep_path,
+                        help="output CSV path of the X0 sweep")
+    modes.add_argument("--model", choices=sorted(healthy_band_models.MODELS) + ["all"],
+                        help="scan a concrete P(X) family instead of the (P', P'') plane")
+    parser.add_argument("--param", action="append",
+                        type=healthy_band_models.parse_param_range, metavar="NAME=MIN:MAX",
+                        help="override a model parameter's sampling range (repeatable; "
+                             "qualify as MODEL.NAME when several models share NAME)")
+    parser.add_argument("--samples", type=int, default=MODEL_SAMPLES,
+                        help="parameter vectors per model")
+    parser.add_argument("--batch-size", type=int, default=MODEL_BATCH,
+                        help="parameter vectors evaluated per batch")
+    parser.add_argument("--seed", type=int, default=0, help="sampling seed")
+    parser.add_argument("--models-out", default=models_path,
+                        help="output CSV path of the model scan summary")
+    modes.add_argument("--qmc", action="store_true",
+                        help="estimate the stable fraction of the window by "
+                             "randomised quasi-Monte Carlo")
+    parser.add_argument("--qmc-target", type=float, default=1e-4,
+                        help="target half-width of the 95%% confidence interval")
+    parser.add_argument("--qmc-batch", type=int, default=4096,
+                        help="points per replicate and batch")
+    parser.add_argument("--qmc-max", type=int, default=1 << 22,
+                        help="maximum points per replicate")
+    parser.add_argument("--qmc-out", default=qmc_path,
+                        help="output JSON path of the QMC estimate")
+    args = parser.parse_args(argv)
+    mode = next((flag for flag, used in (("--adaptive", args.adaptive),
+                                         ("--sweep-X0", args.sweep_X0 is not None),
+                                         ("--model", args.model is not None),
+                                         ("--qmc", args.qmc),
+                                         ("--expand-sparse", args.expand_sparse))
+                 if used), None)
+    if mode is not None:
+        grid_only = [flag for flag, used in (("--format", args.format is not None),
+                                             ("--eps", args.eps is not None),
+                                             ("--resume", args.resume),
+                                             ("--summary-out", args.summary_out is not None),
+                                             ("--cs2-strong", args.cs2_strong is not None))
+                     if used]
+        if grid_only:
+            parser.error("grid-scan option(s) %s cannot be combined with %s"
+                         % (", ".join(grid_only), mode))
+    args.format = args.format or "csv"
+    if args.cs2_strong is None:
+        args.cs2_strong = CS2_STRONG_COUPLING
+    if args.model is not None:
+        names = list(healthy_band_models.MODELS) if args.model == "all" else [args.model]
+        try:
+            args.param_ranges = healthy_band_models.resolve_param_ranges(names, args.param or [])
+        except ValueError as exc:
+            parser.error(str(exc))
+    elif args.param:
+        parser.error("--param requires --model")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.adaptive:
+        run_adaptive(args)
+        return
+    if args.sweep_X0 is not None:
+        run_sweep(args)
+        return
+    if args.model is not None:
+        run_models(args)
+        return
+    if args.qmc:
+        run_qmc(args)
+        return
+    if args.expand_sparse:
+        expand_sparse(args.expand_sparse, args.out or out_path)
+        return
+
+    Pprime_axis = grid_axis(*args.pprime)
+    P2prime_axis = grid_axis(*args.p2prime)
+
+    args.out = args.out or {"csv": out_path, "binary": binary_path,
+                            "sparse": sparse_path}[args.format]
+    eps = args.eps if args.eps is not None else max(args.pprime[2], args.p2prime[2])
+    config = {"format": args.format, "X0": args.X0, "cs2_strong": args.cs2_strong,
+              "pprime": args.pprime, "p2prime": args.p2prime}
+    if args.format == "sparse":
+        config["eps"] = eps
+    checkpoint = scan_checkpoint.Checkpoint(args.out, config)
+    state = None
+    if args.resume:
+        try:
+            state = checkpoint.load()
+        except ValueError as exc:
+            # A checkpoint of a different configuration: a usage error
+            raise SystemExit("error: %s" % exc)
+    if args.resume and state is None:
+        print(f"No checkpoint for {args.out}; starting from the beginning.")
+    start = state["next_row"] if state else 0
+    if state:
+        summary = healthy_band_io.StabilitySummary.from_state(state["summary"])
+    else:
+        summary = healthy_band_io.StabilitySummary()
+
+    chunks = iter_chunks(Pprime_axis, P2prime_axis, args.X0, start=start,
+                         cs2_strong=args.cs2_strong)
+    if args.format == "binary":
+        with healthy_band_io.ScanWriter(args.out, Pprime_axis, P2prime_axis,
+                                        resume=state is not None, X0=args.X0,
+                                        pprime=list(args.pprime),
+                                        p2prime=list(args.p2prime)) as writer:
+            for rows, result in chunks:
+                writer.write(rows, result)
+                summary.update(result)
+                writer.flush()
+                checkpoint.save(next_row=rows.stop, summary=summary.state())
+    elif args.format == "sparse":
+        with scan_checkpoint.open_output(args.out, state) as f:
+            if state is None:
+                healthy_band_io.write_sparse_header(
+                    f, X0=args.X0, pprime=list(args.pprime), p2prime=list(args.p2prime),
+                    shape=[len(Pprime_axis), len(P2prime_axis)], eps=eps)
+            for rows, result in chunks:
+                healthy_band_io.write_sparse_chunk(
+                    f, healthy_band_io.encode_sparse(rows.start, result, eps))
+                summary.update(result)
+                scan_checkpoint.sync(f)
+                checkpoint.save(next_row=rows.stop, bytes=f.tell(), summary=summary.state())
+    else:
+        Pprime_str = format_axis(Pprime_axis)
+        P2prime_str = format_axis(P2prime_axis)
+        with scan_checkpoint.open_output(args.out, state) as f:
+            if state is None:
+                f.write(CSV_HEADER.encode("ascii"))
+            for rows, result in chunks:
+                f.write(format_rows(Pprime_str[rows], P2prime_str, result).encode("ascii"))
+                summary.update(result)
+                scan_checkpoint.sync(f)
+                checkpoint.save(next_row=rows.stop, bytes=f.tell(), summary=summary.state())
+        write_sidecar(args.out, X0=args.X0, pprime=list(args.pprime),
+                      p2prime=list(args.p2prime))
+    checkpoint.remove()
+    with open(args.summary_out or summary_path(args.out), "w", encoding="utf-8") as f:
+        json.dump({"scan": args.out, "X0": args.X0, "pprime": list(args.pprime),
+                   "p2prime": list(args.p2prime), "cs2_strong": args.cs2_strong,
+                   **summary.state()}, f, indent=2)
+        f.write("\n")
+
+    # Grid-counted fraction against the exact area fraction of the window
+    _, _, frac_exact = healthy_band_region.stable_region(
+        args.X0, Pprime_axis[0], Pprime_axis[-1], P2prime_axis[0], P2prime_axis[-1])
+    print(f"Written healthy-band scan to {args.out}")
+    print(f"Stable fraction: grid {summary.n_stable / summary.n_points:.6f}, "
+          f"exact {frac_exact:.6f}")
+    print(f"Stable points with c_s^2 > 1: {summary.n_superluminal}, "
+          f"with c_s^2 < {args.cs2_strong:g}: {summary.n_strong_coupling}")
+
 
-def frange(start, stop, step):
-    x = start
-    # be generous with end condition to avoid floating point glitches
-    while x <= stop + 1e-9:
-        yield x
-        x += step
-
-with open(out_path, "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow(["Pprime", "P2prime", "Zs", "Zt", "cs2", "ghost_ok", "grad_ok"])
-    for Pprime in frange(PPRIME_MIN, PPRIME_MAX, PPRIME_STEP):
-        for P2prime in frange(P2PRIME_MIN, P2PRIME_MAX, P2PRIME_STEP):
-            Zs = Pprime
-            Zt = Pprime + 2.0 * X0 * P2prime
-            ghost_ok = Zt > 0.0
-            grad_ok = Zs > 0.0
-            cs2 = None
-            if ghost_ok:
-                cs2 = Zs / Zt
-            writer.writerow([
-                f"{Pprime:.3f}",
-                f"{P2prime:.3f}",
-                f"{Zs:.3f}",
-                f"{Zt:.3f}",
-                "" if cs2 is None else f"{cs2:.3f}",
-                int(ghost_ok),
-                int(grad_ok),
-            ])
-
-print(f"Written healthy-band scan to {out_path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Constant-gradient background metric for covariant spin-2 contractions.
+
+The composite metric on the background Phi_0 = q_mu x^mu is
+
+  gbar_{mu nu} = eta_{mu nu} + alpha q_mu q_nu,
+
+with inverse (Sherman-Morrison, q^mu = eta^{mu nu} q_nu, q^2 = q^mu q_mu)
+
+  gbar^{mu nu} = eta^{mu nu} - alpha q^mu q^nu / (1 + alpha q^2).
+
+A Background holds gbar_{mu nu}, gbar^{mu nu} and the raised gradient
+once per (q, alpha), so a sweep over momenta raises indices with a fixed
+matrix and never inverts anything per sample.  get_background caches the
+objects in an LRU keyed by (q, alpha); the arrays are read-only because
+they are shared between callers.
+"""
+
+import functools
+
+import numpy as np
+
+import spin2_engine
+
+# Number of distinct (q, alpha) backgrounds kept by get_background.
+BACKGROUND_CACHE_SIZE = 64
+
+
+class Background:
+    """gbar = eta + alpha q q, its inverse and the index-raising maps."""
+
+    def __init__(self, q, alpha=0.0):
+        q = np.array(q, dtype=float)
+        if q.shape != (4,):
+            raise ValueError("q must be a 4-vector, got shape %r" % (q.shape,))
+        eta = spin2_engine.ETA
+        q_eta = eta @ q
+        denom = 1.0 + alpha * (q @ q_eta)
+        if abs(denom) < 1e-12:
+            raise ValueError("gbar is degenerate: 1 + alpha q^2 = 0.")
+
+        self.q = q
+        self.alpha = float(alpha)
+        self.g = eta + alpha * np.outer(q, q)
+        self.g_inv = eta - alpha * np.outer(q_eta, q_eta) / denom
+        self.q_up = self.g_inv @ q
+        for arr in (self.q, self.g, self.g_inv, self.q_up):
+            arr.setflags(write=False)
+
+    def __repr__(self):
+        return "Background(q=%r, alpha=%r)" % (self.q.tolist(), self.alpha)
+
+    def raise_index(self, v):
+        """Return v^mu = gbar^{mu nu} v_nu for an (N,4) array of v_mu."""
+        return spin2_engine.as_momenta(v) @ self.g_inv
+
+    def dot(self, a, b):
+        """Return gbar^{mu nu} a_mu b_nu row by row."""
+        return np.sum(self.raise_index(a) * spin2_engine.as_momenta(b), axis=1)
+
+    def k2(self, k):
+        """Return k^2 = gbar^{mu nu} k_mu k_nu for an (N,4) array of k_mu."""
+        return self.dot(k, k)
+
+    def theta(self, k, k2=None):
+        """Return theta_{mu nu} = gbar_{mu nu} - k_mu k_nu / k^2, shape (N,4,4)."""
+        k = spin2_engine.as_momenta(k)
+        if k2 is None:
+            k2 = self.k2(k)
+        return self.g - k[:, :, np.newaxis] * k[:, np.newaxis, :] / k2[:, np.newaxis, np.newaxis]
+
+    def theta_up(self, k, k2=None):
+        """Return theta^{mu nu} = gbar^{mu nu} - k^mu k^nu / k^2, shape (N,4,4)."""
+        k_up = self.raise_index(k)
+        if k2 is None:
+            k2 = self.k2(k)
+        return self.g_inv - k_up[:, :, np.newaxis] * k_up[:, np.newaxis, :] / k2[:, np.newaxis, np.newaxis]
+
+
+@functools.lru_cache(maxsize=BACKGROUND_CACHE_SIZE)
+def _cached_background(q, alpha):
+    return Background(q, alpha)
+
+
+def get_background(q, alpha=0.0):
+    """Return the cached Background for (q, alpha)."""
+    return _cached_background(tuple(float(x) for x in q), float(alpha))
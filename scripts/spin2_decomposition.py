@@ -0,0 +1,109 @@
+"""
+Batched spin decomposition of the source tensor N(q,k) onto the four
+projectors of the conventions appendix,
+
+  P^{(2)}   = (1/2)(theta theta + theta theta) - (1/3) theta theta,
+  P^{(1)}   = (1/2)(theta omega + theta omega + theta omega + theta omega),
+  P^{(0-s)} = (1/3) theta theta,
+  P^{(0-w)} = omega omega,
+
+with theta = eta - k k / k^2 and omega = k k / k^2.  As in spin2_engine.py,
+N = S S with S = q k + k q, so each projection is a combination of the traces
+
+  T(M)     = tr(M S)     = 2 q.M.k,
+  T(M, M') = tr(M S M' S) = 2 (q.M.k)(q.M'.k) + (q.M.q)(k.M'.k) + (k.M.k)(q.M'.q),
+
+and only the six scalars q.M.k, q.M.q, k.M.k for M = theta, omega are needed.
+These are built once per momentum and shared by all four projections:
+
+  P^{(2)}   . N = T(theta, theta) - T(theta)^2 / 3,
+  P^{(1)}   . N = 2 T(theta, omega),
+  P^{(0-s)} . N = T(theta)^2 / 3,
+  P^{(0-w)} . N = T(omega)^2.
+
+By default contractions are flat sums over lowered indices, as in
+contract_P2_N.  Given a spin2_background.Background, theta is built from
+gbar and every index is raised with gbar^{mu nu}, i.e. x.M.y becomes
+x^mu M_{mu nu} y^nu.  Note that with this N the covariant spin-2 and
+spin-0-s projections vanish identically (theta_{mu nu} k^nu = 0), so the
+flat convention remains the default for the sample CSV.  The
+coefficients A, B, C, D are the projections divided by the projector traces
+N_2 = 5, N_1 = 3, N_0s = N_0w = 1, so that A = F2 / 5.
+"""
+
+import numpy as np
+
+import spin2_engine
+
+# Projector traces P^{(i)}_{mu nu}^{mu nu}: dimensions of the spin subspaces.
+PROJECTOR_TRACES = {"A": 5.0, "B": 3.0, "C": 1.0, "D": 1.0}
+
+
+def shared_bilinears(q, k, background=None, k2=None):
+    """
+    Return the theta and omega bilinears (q.M.k, q.M.q, k.M.k) for an (N,4)
+    array of k_mu, as two tuples of length-N arrays.
+
+    With background=None the sums are flat; otherwise indices are raised
+    with the background's gbar^{mu nu} (and q is taken from it).  k2 may be
+    passed in when it is known more accurately than the components give it.
+    Only exactly null momenta are singular (NaN); in the flat case k.theta.k
+    is evaluated in product form, as in spin2_engine.F2_closed_form.
+    """
+    k = spin2_engine.as_momenta(k)
+    if background is None:
+        q = np.broadcast_to(np.asarray(q, dtype=float), k.shape)
+        eta = np.diag(spin2_engine.ETA)
+        if k2 is None:
+            k2 = spin2_engine.k2_factored(k)
+        k2 = np.where(k2 != 0.0, k2, np.nan)
+        qk = np.sum(q * k, axis=1)
+        kk = np.sum(k * k, axis=1)
+        omega = (qk * kk / k2, qk * qk / k2, kk * kk / k2)
+        kk_theta = -4.0 * k[:, 0] * k[:, 0] * np.sum(k[:, 1:] * k[:, 1:], axis=1) / k2
+        theta = (np.sum(q * eta * k, axis=1) - omega[0],
+                 np.sum(q * eta * q, axis=1) - omega[1],
+                 kk_theta)
+    else:
+        q = np.broadcast_to(background.q, k.shape)
+        if k2 is None:
+            k2 = background.k2(k)
+        k2 = np.where(k2 != 0.0, k2, np.nan)
+        qk = background.dot(q, k)
+        qq = background.dot(q, q)
+        omega = (qk, qk * qk / k2, k2)
+        theta = (qk - omega[0], qq - omega[1], k2 - omega[2])
+    return theta, omega
+
+
+def _trace1(M):
+    return 2.0 * M[0]
+
+
+def _trace2(M, Mp):
+    return 2.0 * M[0] * Mp[0] + M[1] * Mp[2] + M[2] * Mp[1]
+
+
+def spin_projections(q, k, background=None, k2=None):
+    """
+    Return the raw contractions P^{(i)} . N for an (N,4) array of k_mu as a
+    dict with keys "A", "B", "C", "D" (spin 2, 1, 0-s, 0-w).
+    """
+    theta, omega = shared_bilinears(q, k, background, k2)
+    t_theta = _trace1(theta)
+    return {
+        "A": _trace2(theta, theta) - t_theta * t_theta / 3.0,
+        "B": 2.0 * _trace2(theta, omega),
+        "C": t_theta * t_theta / 3.0,
+        "D": _trace1(omega) ** 2,
+    }
+
+
+def normalise(proj):
+    """Divide raw projections by the projector traces."""
+    return {name: proj[name] / PROJECTOR_TRACES[name] for name in proj}
+
+
+def spin_coefficients(q, k, background=None, k2=None):
+    """Return A, B, C, D (projections normalised by the projector traces)."""
+    return normalise(spin_projections(q, k, background, k2))
@@ -0,0 +1,140 @@
+"""
+Batched evaluation of the spin-2 projector contraction F2(q,k).
+
+The per-sample functions in check_spin2_structure.py build theta, P^{(2)}
+and N as nested 4x4x4x4 lists and contract them with four Python loops.
+Here the same quantity is evaluated for an (N,4) array of momenta k_mu in
+a handful of array operations.  Since N factorises,
+
+  N_{mu nu rho sigma} = S_{mu nu} S_{rho sigma},   S_{mu nu} = q_mu k_nu + q_nu k_mu,
+
+the contraction with P^{(2)} never needs the rank-4 tensors:
+
+  P^{(2)} . N = tr(theta S theta S) - (1/3) tr(theta S)^2,
+
+where the traces are plain sums over lowered indices, exactly as in
+contract_P2_N.  Writing x.M.y = x_mu M_{mu nu} y_nu for those flat sums,
+the traces collapse further to three scalars,
+
+  a = q.theta.k,   b = k.theta.k,   c = q.theta.q,
+  P^{(2)} . N = (2/3) a^2 + 2 b c,
+
+and for the timelike background q_mu = (q0,0,0,0) to a rational function of
+omega and |k| alone,
+
+  F2 = (32/3) q0^2 omega^2 |k|^4 / (k^2)^2,   k^2 = (|k| - omega)(|k| + omega).
+
+The closed forms are the production path; the tensor forms are kept to
+verify them.  Near the light cone they are evaluated without cancellation:
+k^2 is formed as (|k| - |omega|)(|k| + |omega|), b is written as the product
+b = -4 omega^2 |k|^2 / k^2 instead of k^2 - (k.k)^2 / k^2, and the remaining
+terms are dominated by a single 1/k^2 piece, so only exactly null momenta
+are singular.  Callers that know k^2 more accurately than the components
+(e.g. the light-cone sampler) can pass it in.  The per-sample functions in
+check_spin2_structure.py remain the reference implementation and all paths
+must agree with them to rounding.
+"""
+
+import numpy as np
+
+# Minkowski metric with signature (-,+,+,+)
+ETA = np.diag([-1.0, 1.0, 1.0, 1.0])
+
+# Same cut as theta_tensor: below this |k^2| the projector is undefined.
+K2_MIN = 1e-10
+
+
+def as_momenta(k):
+    """Return k as a float array of shape (N,4)."""
+    k = np.asarray(k, dtype=float)
+    if k.ndim == 1:
+        k = k[np.newaxis, :]
+    if k.shape[-1] != 4:
+        raise ValueError("momenta must have shape (N,4), got %r" % (k.shape,))
+    return k
+
+
+def minkowski_k2(k):
+    """Return k^2 = -omega^2 + |k|^2 for an (N,4) array of k_mu."""
+    k = as_momenta(k)
+    return -k[:, 0] * k[:, 0] + np.sum(k[:, 1:] * k[:, 1:], axis=1)
+
+
+def k2_factored(k):
+    """Return k^2 = (|k| - |omega|)(|k| + |omega|), accurate near the light cone."""
+    k = as_momenta(k)
+    kmag = np.sqrt(np.sum(k[:, 1:] * k[:, 1:], axis=1))
+    omega = np.abs(k[:, 0])
+    return (kmag - omega) * (kmag + omega)
+
+
+def theta_batch(k, k2=None):
+    """Return theta_{mu nu} = eta_{mu nu} - k_mu k_nu / k^2 with shape (N,4,4)."""
+    k = as_momenta(k)
+    if k2 is None:
+        k2 = minkowski_k2(k)
+    return ETA - k[:, :, np.newaxis] * k[:, np.newaxis, :] / k2[:, np.newaxis, np.newaxis]
+
+
+def source_batch(q, k):
+    """Return S_{mu nu} = q_mu k_nu + q_nu k_mu with shape (N,4,4)."""
+    k = as_momenta(k)
+    q = np.broadcast_to(np.asarray(q, dtype=float), k.shape)
+    qk = q[:, :, np.newaxis] * k[:, np.newaxis, :]
+    return qk + np.swapaxes(qk, 1, 2)
+
+
+def F2_batch(q, k):
+    """
+    Return F2 = P^{(2)} . N for every row of an (N,4) array of k_mu.
+
+    q may be a single 4-vector (shared background) or an (N,4) array.
+    Entries with |k^2| < K2_MIN, where theta_tensor would raise, are NaN.
+    """
+    k = as_momenta(k)
+    k2 = minkowski_k2(k)
+    valid = np.abs(k2) >= K2_MIN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta = theta_batch(k, np.where(valid, k2, np.nan))
+    thetaS = np.matmul(theta, source_batch(q, k))
+    tr1 = np.trace(thetaS, axis1=1, axis2=2)
+    tr2 = np.einsum("nij,nji->n", thetaS, thetaS)
+    return tr2 - tr1 * tr1 / 3.0
+
+
+def F2_closed_form(q, k, k2=None):
+    """
+    Return F2 = (2/3) a^2 + 2 b c for every row of an (N,4) array of k_mu.
+
+    Same conventions as F2_batch, with no (N,4,4) arrays and no cut near
+    the light cone: only exactly null momenta (k^2 = 0) are NaN.
+    """
+    k = as_momenta(k)
+    q = np.broadcast_to(np.asarray(q, dtype=float), k.shape)
+    if k2 is None:
+        k2 = k2_factored(k)
+    k2 = np.where(k2 != 0.0, k2, np.nan)
+    qk_eta = np.sum(q * k * np.diag(ETA), axis=1)
+    qq_eta = np.sum(q * q * np.diag(ETA), axis=1)
+    qk = np.sum(q * k, axis=1)
+    kk = np.sum(k * k, axis=1)
+    a = qk_eta - qk * kk / k2
+    b = -4.0 * k[:, 0] * k[:, 0] * np.sum(k[:, 1:] * k[:, 1:], axis=1) / k2
+    c = qq_eta - qk * qk / k2
+    return (2.0 / 3.0) * a * a + 2.0 * b * c
+
+
+def F2_rest_frame(q0, omega, kmag, k2=None):
+    """
+    Return F2 for q_mu = (q0,0,0,0) as a function of omega and |k|.
+
+    k^2 defaults to (|k| - omega)(|k| + omega), which stays accurate near
+    the light cone; exactly null momenta give inf.
+    """
+    omega = np.asarray(omega, dtype=float)
+    kmag = np.asarray(kmag, dtype=float)
+    if k2 is None:
+        k2 = (kmag - omega) * (kmag + omega)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = omega * kmag * kmag / k2
+    return (32.0 / 3.0) * q0 * q0 * ratio * ratio
@@ -0,0 +1,131 @@
+"""
+Momentum grids for the spin-2 sampler.
+
+Each axis is a uniform range given as "start:stop:num" (num points,
+endpoints included) or as a single value.  Points are addressed by a flat
+integer index in C order, the last axis varying fastest, and are
+generated lazily in chunks of at most chunk_size rows, so the full grid is
+never materialised and memory stays bounded however many points it has.
+
+Two parametrisations of k_mu are available:
+
+  cartesian  (omega, kx, ky, kz),
+  spherical  (omega, |k|, theta, phi)  with
+             k = |k| (sin theta cos phi, sin theta sin phi, cos theta).
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+class Axis:
+    """Uniform grid axis of num points from start to stop inclusive."""
+
+    def __init__(self, start, stop, num):
+        if num < 1:
+            raise ValueError("axis needs at least one point")
+        if num == 1 and stop != start:
+            raise ValueError("single-point axis must have start == stop")
+        self.start = float(start)
+        self.stop = float(stop)
+        self.num = int(num)
+
+    @classmethod
+    def parse(cls, text):
+        """Build an axis from "start:stop:num" or a single value."""
+        parts = text.split(":")
+        if len(parts) == 1:
+            value = float(parts[0])
+            return cls(value, value, 1)
+        if len(parts) != 3:
+            raise ValueError("axis must be 'value' or 'start:stop:num', got %r" % text)
+        return cls(float(parts[0]), float(parts[1]), int(parts[2]))
+
+    def __repr__(self):
+        return "Axis(%r, %r, %r)" % (self.start, self.stop, self.num)
+
+    @property
+    def step(self):
+        if self.num == 1:
+            return 0.0
+        return (self.stop - self.start) / (self.num - 1)
+
+    def values(self, idx):
+        """Return the axis values at integer indices idx."""
+        return self.start + np.asarray(idx) * self.step
+
+
+def grid_size(axes):
+    """Return the number of points on the product grid."""
+    return math.prod(axis.num for axis in axes)
+
+
+def iter_grid_chunks(axes, chunk_size=DEFAULT_CHUNK_SIZE, start=0, stop=None):
+    """
+    Yield (n, len(axes)) arrays of grid points with flat indices in
+    [start, stop), in C order and at most chunk_size rows at a time.
+    """
+    shape = tuple(axis.num for axis in axes)
+    if stop is None:
+        stop = grid_size(axes)
+    for lo in range(start, stop, chunk_size):
+        flat = np.arange(lo, min(lo + chunk_size, stop))
+        idx = np.unravel_index(flat, shape)
+        yield np.column_stack([axis.values(i) for axis, i in zip(axes, idx)])
+
+
+def cartesian_to_momenta(points):
+    """(omega, kx, ky, kz) are already the components of k_mu."""
+    return points
+
+
+def spherical_to_momenta(points):
+    """(omega, |k|, theta, phi) -> k_mu = (omega, kx, ky, kz)."""
+    omega, kmag, theta, phi = points.T
+    sin_theta = np.sin(theta)
+    return np.column_stack([omega,
+                            kmag * sin_theta * np.cos(phi),
+                            kmag * sin_theta * np.sin(phi),
+                            kmag * np.cos(theta)])
+
+
+PARAMETRISATIONS = {
+    "cartesian": cartesian_to_momenta,
+    "spherical": spherical_to_momenta,
+}
+
+
+def momentum_chunks(axes, parametrisation="cartesian",
+                    chunk_size=DEFAULT_CHUNK_SIZE, start=0, stop=None):
+    """Yield (n,4) arrays of k_mu over the grid spanned by four axes."""
+    if len(axes) != 4:
+        raise ValueError("momentum grids need exactly four axes")
+    to_momenta = PARAMETRISATIONS[parametrisation]
+    for points in iter_grid_chunks(axes, chunk_size, start, stop):
+        yield to_momenta(points)
+
+
+def light_cone_samples(omega_values, k2_min=1e-14, k2_max=1e-8, per_decade=4):
+    """
+    Return near-null samples (omega, |k|, k2) densified toward the light cone.
+
+    For every omega, |k^2| runs log-uniformly from k2_max down to k2_min
+    with per_decade points per decade, on both sides of the cone
+    (k^2 < 0 and k^2 > 0), and |k| = sqrt(omega^2 + k^2).  k2 is returned
+    exactly as sampled: recomputing it from omega and |k| would cancel
+    catastrophically, so evaluators should use it directly.  Samples with
+    omega^2 + k^2 < 0 have no real |k| and are dropped; the second return
+    value counts them.
+    """
+    decades = math.log10(k2_max / k2_min)
+    n = max(2, int(math.ceil(decades * per_decade)) + 1)
+    mags = np.logspace(math.log10(k2_max), math.log10(k2_min), n)
+    k2 = np.concatenate([-mags, mags[::-1]])
+    omega = np.repeat(np.asarray(omega_values, dtype=float), k2.size)
+    k2 = np.tile(k2, len(omega_values))
+    kmag2 = omega * omega + k2
+    ok = kmag2 >= 0.0
+    return (omega[ok], np.sqrt(kmag2[ok]), k2[ok]), int(np.sum(~ok))
@@ -0,0 +1,152 @@
+"""
+Compact symmetric-pair storage for rank-2 and rank-4 tensors.
+
+A symmetric T_{mu nu} has 10 independent entries, one per index pair
+(mu <= nu).  Storing the off-diagonal pairs with weight sqrt(2),
+
+  t_a = w_a T_{mu_a nu_a},   w_a = 1 (mu_a = nu_a),  sqrt(2) (mu_a < nu_a),
+
+makes the flat double contraction a dot product, T_{mu nu} U_{mu nu} = t . u.
+A rank-4 tensor symmetric in (mu nu) and in (rho sigma) becomes the 10x10
+matrix M_ab = w_a w_b P_{mu_a nu_a rho_b sigma_b}, so that
+
+  P_{mu nu rho sigma} N_{mu nu rho sigma} = sum_ab M_ab N_ab,
+  P_{mu nu rho sigma} S_{mu nu} S_{rho sigma} = s . M . s,
+
+and composing two such operators over a shared index pair is M_P @ M_Q.
+Per-sample storage drops from 256 to 100 floats, and to the 55 upper
+triangular entries when the tensor is also symmetric under pair exchange
+(P_{mu nu rho sigma} = P_{rho sigma mu nu}), as all four spin projectors
+are.  Contractions are flat sums over lowered indices, the convention of
+contract_P2_N; raise indices first for covariant contractions.
+"""
+
+import numpy as np
+
+import spin2_engine
+
+# Index pairs (mu, nu) with mu <= nu: diagonal first, then off-diagonal.
+PAIRS = [(0, 0), (1, 1), (2, 2), (3, 3),
+         (0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]
+PAIR_I = np.array([p[0] for p in PAIRS])
+PAIR_J = np.array([p[1] for p in PAIRS])
+PAIR_WEIGHTS = np.where(PAIR_I == PAIR_J, 1.0, np.sqrt(2.0))
+
+# Upper triangle of a 10x10 pair matrix, and the weights that restore the
+# Frobenius product from it (off-diagonal entries appear twice).
+TRIU_A, TRIU_B = np.triu_indices(10)
+TRIU_WEIGHTS = np.where(TRIU_A == TRIU_B, 1.0, 2.0)
+
+
+def pack_sym2(T):
+    """Pack symmetric (...,4,4) tensors into weighted (...,10) vectors."""
+    T = np.asarray(T, dtype=float)
+    return PAIR_WEIGHTS * T[..., PAIR_I, PAIR_J]
+
+
+def unpack_sym2(t):
+    """Inverse of pack_sym2."""
+    t = np.asarray(t, dtype=float) / PAIR_WEIGHTS
+    T = np.zeros(t.shape[:-1] + (4, 4))
+    T[..., PAIR_I, PAIR_J] = t
+    T[..., PAIR_J, PAIR_I] = t
+    return T
+
+
+def pack_sym4(P):
+    """Pack (...,4,4,4,4) tensors with (mu nu), (rho sigma) symmetry into (...,10,10)."""
+    P = np.asarray(P, dtype=float)
+    i, j = PAIR_I[:, np.newaxis], PAIR_J[:, np.newaxis]
+    k, l = PAIR_I[np.newaxis, :], PAIR_J[np.newaxis, :]
+    return np.outer(PAIR_WEIGHTS, PAIR_WEIGHTS) * P[..., i, j, k, l]
+
+
+def unpack_sym4(M):
+    """Inverse of pack_sym4."""
+    M = np.asarray(M, dtype=float) / np.outer(PAIR_WEIGHTS, PAIR_WEIGHTS)
+    P = np.zeros(M.shape[:-2] + (4, 4, 4, 4))
+    i, j = PAIR_I[:, np.newaxis], PAIR_J[:, np.newaxis]
+    k, l = PAIR_I[np.newaxis, :], PAIR_J[np.newaxis, :]
+    for a, b in ((i, j), (j, i)):
+        for c, d in ((k, l), (l, k)):
+            P[..., a, b, c, d] = M
+    return P
+
+
+def pack_triu(M):
+    """Keep the 55 upper-triangular entries of pair-exchange symmetric (...,10,10) matrices."""
+    return np.asarray(M, dtype=float)[..., TRIU_A, TRIU_B]
+
+
+def unpack_triu(m):
+    """Inverse of pack_triu."""
+    m = np.asarray(m, dtype=float)
+    M = np.zeros(m.shape[:-1] + (10, 10))
+    M[..., TRIU_A, TRIU_B] = m
+    M[..., TRIU_B, TRIU_A] = m
+    return M
+
+
+def contract(M, N):
+    """Return the full contraction of two packed rank-4 tensors (...,10,10)."""
+    return np.sum(np.asarray(M) * np.asarray(N), axis=(-2, -1))
+
+
+def contract_triu(m, n):
+    """Return the full contraction of two pair-exchange symmetric tensors in 55-entry form."""
+    return np.sum(TRIU_WEIGHTS * np.asarray(m) * np.asarray(n), axis=-1)
+
+
+def quad_form(M, s):
+    """Return s . M . s, i.e. P_{mu nu rho sigma} S_{mu nu} S_{rho sigma}."""
+    s = np.asarray(s, dtype=float)
+    return np.einsum("...a,...ab,...b->...", s, M, s)
+
+
+def sym_product(A, B):
+    """
+    Return (1/2)(A_{mu rho} B_{nu sigma} + A_{mu sigma} B_{nu rho}) in pair
+    form for batches of (...,4,4) tensors.
+    """
+    A = np.asarray(A, dtype=float)
+    B = np.asarray(B, dtype=float)
+    i, j = PAIR_I[:, np.newaxis], PAIR_J[:, np.newaxis]
+    k, l = PAIR_I[np.newaxis, :], PAIR_J[np.newaxis, :]
+    prod = 0.5 * (A[..., i, k] * B[..., j, l] + A[..., i, l] * B[..., j, k])
+    return np.outer(PAIR_WEIGHTS, PAIR_WEIGHTS) * prod
+
+
+def outer_pairs(a, b):
+    """Return A_{mu nu} B_{rho sigma} in pair form from packed (...,10) vectors."""
+    return np.asarray(a)[..., :, np.newaxis] * np.asarray(b)[..., np.newaxis, :]
+
+
+def projector_pairs(k, background=None):
+    """
+    Return the four spin projectors for an (N,4) array of k_mu as a dict of
+    (N,10,10) arrays keyed "A", "B", "C", "D" (spin 2, 1, 0-s, 0-w).
+
+    theta is built from eta, or from gbar when a background is given.
+    """
+    k = spin2_engine.as_momenta(k)
+    if background is None:
+        k2 = spin2_engine.minkowski_k2(k)
+        theta = spin2_engine.theta_batch(k, k2)
+    else:
+        k2 = background.k2(k)
+        theta = background.theta(k, k2)
+    omega = k[:, :, np.newaxis] * k[:, np.newaxis, :] / k2[:, np.newaxis, np.newaxis]
+    t = pack_sym2(theta)
+    w = pack_sym2(omega)
+    tt = outer_pairs(t, t)
+    return {
+        "A": sym_product(theta, theta) - tt / 3.0,
+        "B": sym_product(theta, omega) + sym_product(omega, theta),
+        "C": tt / 3.0,
+        "D": outer_pairs(w, w),
+    }
+
+
+def source_pairs(q, k):
+    """Return S = q k + k q in packed (N,10) form; N_{mu nu rho sigma} = s s."""
+    return pack_sym2(spin2_engine.source_batch(q, k))
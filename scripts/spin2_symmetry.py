@@ -0,0 +1,132 @@
+"""
+Rotational-symmetry reduction of spin-2 scans.
+
+For a purely timelike background q_mu = (q0,0,0,0) (with or without the
+disformal alpha q q term) every scalar contraction depends on k_mu only
+through omega and |k|^2.  A dense scan over (kx, ky, kz) or (|k|, theta,
+phi) therefore repeats the same evaluation for every spatial direction.
+In reduced mode only the (omega, |k|) plane is evaluated: the distinct
+values of |k|^2 on the spatial part of the grid are collected once, and
+the reduced table holds one row per (omega, |k|^2) pair.  The table is
+written together with a JSON sidecar describing the symmetry and the
+original grid, from which full 3-momentum rows can be regenerated on
+demand without re-evaluating anything.
+
+|k|^2 is keyed by the exact float sum kx^2 + ky^2 + kz^2 that the full scan
+computes, so expanded rows carry exactly the k^2 and F2 of a direct scan;
+the A-D coefficients agree with it to rounding.
+"""
+
+import json
+
+import numpy as np
+
+import spin2_grids
+
+REDUCED_COLUMNS = ["omega", "kmag", "kmag2", "k2", "F2", "A", "B", "C", "D"]
+
+
+def has_rotational_symmetry(q):
+    """True when q_mu has no spatial components."""
+    return q[1] == q[2] == q[3] == 0.0
+
+
+def spatial_keys(k):
+    """Return |k|^2 as the full scan computes it, for an (N,4) array of k_mu."""
+    return np.sum(k[:, 1:] * k[:, 1:], axis=1)
+
+
+def distinct_kmag2(axes, parametrisation, chunk_size=spin2_grids.DEFAULT_CHUNK_SIZE):
+    """
+    Return the sorted distinct |k|^2 over the spatial part of the grid.
+
+    Only the three spatial axes are walked (omega held fixed), chunk by
+    chunk, so the cost is that of one omega slice.
+    """
+    spatial_axes = [spin2_grids.Axis(0.0, 0.0, 1)] + list(axes[1:])
+    keys = np.empty(0)
+    for k in spin2_grids.momentum_chunks(spatial_axes, parametrisation, chunk_size):
+        keys = np.union1d(keys, spatial_keys(k))
+    return keys
+
+
+def reduced_momenta(omega_values, kmag2):
+    """
+    Return representative k_mu = (omega, |k|, 0, 0) for every (omega, |k|^2)
+    pair, omega varying slowest, together with k^2 formed exactly as
+    spin2_engine.k2_factored forms it on the full grid.
+    """
+    omega = np.repeat(np.asarray(omega_values, dtype=float), len(kmag2))
+    kmag = np.tile(np.sqrt(kmag2), len(omega_values))
+    zeros = np.zeros_like(omega)
+    abs_omega = np.abs(omega)
+    k2 = (kmag - abs_omega) * (kmag + abs_omega)
+    return np.column_stack([omega, kmag, zeros, zeros]), k2
+
+
+def write_metadata(path, q, alpha, axes, parametrisation, n_full, n_reduced, table_path):
+    """Write the symmetry metadata sidecar of a reduced table."""
+    meta = {
+        "symmetry": "SO(3) rotations of the spatial momentum (q_mu = (q0,0,0,0))",
+        "q": list(map(float, q)),
+        "alpha": alpha,
+        "parametrisation": parametrisation,
+        "axes": [[axis.start, axis.stop, axis.num] for axis in axes],
+        "full_points": n_full,
+        "reduced_points": n_reduced,
+        "table": table_path,
+        "columns": REDUCED_COLUMNS,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+        f.write("\n")
+    return meta
+
+
+def read_metadata(path):
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["axes"] = [spin2_grids.Axis(*spec) for spec in meta["axes"]]
+    return meta
+
+
+def load_reduced_table(path):
+    """Load a reduced table as a dict of float arrays keyed by column name."""
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    with open(path, encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+    return {name: data[:, i] for i, name in enumerate(header)}
+
+
+def _positions(values, x):
+    """Return the index of each entry of x in the (unsorted, distinct) array values."""
+    order = np.argsort(values)
+    pos = np.searchsorted(values, x, sorter=order)
+    return order[np.minimum(pos, len(values) - 1)]
+
+
+def expand_chunks(meta, table, chunk_size=spin2_grids.DEFAULT_CHUNK_SIZE):
+    """
+    Yield full-grid rows (omega, kx, ky, kz, k2, F2, A, B, C, D) chunk by
+    chunk, in grid order, by looking every grid point up in the reduced
+    table.  Points absent from the table (rejected, exactly null) are
+    skipped, as the direct scan skips them.
+    """
+    axes = meta["axes"]
+    omega_values = axes[0].values(np.arange(axes[0].num))
+    keys = np.unique(table["kmag2"])
+    # Dense (omega, |k|^2) -> table row index; -1 where no row exists
+    lookup = np.full((len(omega_values), len(keys)), -1, dtype=np.int64)
+    i_omega = _positions(omega_values, table["omega"])
+    i_key = np.searchsorted(keys, table["kmag2"])
+    lookup[i_omega, i_key] = np.arange(len(table["omega"]))
+    values = np.column_stack([table[name] for name in ("k2", "F2", "A", "B", "C", "D")])
+
+    for k in spin2_grids.momentum_chunks(axes, meta["parametrisation"], chunk_size):
+        grid_keys = spatial_keys(k)
+        j = np.searchsorted(keys, grid_keys)
+        j = np.minimum(j, len(keys) - 1)
+        i = _positions(omega_values, k[:, 0])
+        rows = np.where(keys[j] == grid_keys, lookup[i, j], -1)
+        keep = rows >= 0
+        yield np.column_stack([k[keep], values[rows[keep]]])